@@ -0,0 +1,51 @@
+import json
+import os
+from contextlib import contextmanager
+
+import numpy as np
+
+
+@contextmanager
+def replacing(path: str):
+    """
+    Yields a temp path next to `path` to write to. When the block finishes the temp
+    file is renamed over `path` in one step, so readers never see half a file; if
+    the block fails it is removed and `path` is left as it was.
+    """
+    tmp = f"{path}.{os.getpid()}.tmp"
+    try:
+        yield tmp
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+def save_npy(path: str, array):
+    # through a file handle, since np.save would add ".npy" to the temp name
+    with replacing(path) as tmp, open(tmp, "wb") as f:
+        np.save(f, array)
+
+
+def save_json(path: str, obj, **kwargs):
+    with replacing(path) as tmp, open(tmp, "w") as f:
+        json.dump(obj, f, **kwargs)
+
+
+class MtimeCache:
+    """
+    path -> load(path), loaded again only when the file's mtime changes, so reruns
+    don't re-read an unchanged file. get() raises OSError if the file doesn't exist.
+    """
+
+    def __init__(self, load):
+        self._load = load
+        self._entries = {}
+
+    def get(self, path: str):
+        mtime = os.stat(path).st_mtime_ns
+        cached = self._entries.get(path)
+        if cached is None or cached[0] != mtime:
+            cached = (mtime, self._load(path))
+            self._entries[path] = cached
+        return cached[1]
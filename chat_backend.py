@@ -0,0 +1,140 @@
+import asyncio
+import queue
+import threading
+
+import plotly.express as px
+
+import profile_store
+import query_planner
+import sql_store
+
+# delay between streamed tokens of the stand-in model (seconds)
+TOKEN_DELAY = 0.02
+
+_DONE = object()
+
+# one event loop on a daemon thread, shared by every session; retrieval and
+# generation run there (and in its thread pool), never on a Streamlit script thread
+_loop = None
+_loop_lock = threading.Lock()
+
+
+def _get_loop():
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="floatchat-backend", daemon=True).start()
+    return _loop
+
+
+def _describe(rows):
+    lines = []
+    for _, row in rows.iterrows():
+        line = f"- {row['description']}"
+        if "latitude" in row and "longitude" in row:
+            line += f" ({row['latitude']}°, {row['longitude']}°E)"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def answer_figure(rows):
+    """Temperature vs depth of the matched profiles, or None if there's nothing to plot."""
+    if rows.empty or not {"temperature", "pressure"} <= set(rows.columns):
+        return None
+    fig = px.scatter(rows, x="temperature", y="pressure", hover_name="description",
+                     labels={"temperature": "Temperature (°C)", "pressure": "Pressure (dbar)"})
+    fig.update_yaxes(autorange="reversed")
+    return fig
+
+
+def build_answer(question: str, retrieve, n_results: int = 3):
+    """
+    Blocking retrieval + answer: returns (text, figure or None). `retrieve` is pandas_query.
+    Questions the planner can structure are answered from the profile store; otherwise
+    semantic retrieval runs, still limited to whatever filters the planner found.
+    """
+    plan = query_planner.parse(question)
+    if plan.kind != "search" and (sql_store.exists() or profile_store.exists()):
+        return query_planner.execute(plan)
+    rows = retrieve(question, n_results, **plan.search_filters()).to_frame()
+    if rows.empty:
+        return "🤖 I couldn't find any ARGO profiles matching that.", None
+    text = f"🤖 Here are the profiles closest to “{question}”:\n\n{_describe(rows)}"
+    return text, answer_figure(rows)
+
+
+async def generate_answer(question: str, retrieve, n_results: int = 3):
+    """
+    Async stand-in for the RAG answer: retrieval runs in a worker thread, then the
+    answer is yielded token by token like an LLM would. The figure (if any) comes last.
+    """
+    text, fig = await asyncio.to_thread(build_answer, question, retrieve, n_results)
+    # keep the newlines so the markdown list survives streaming
+    for token in text.split(" "):
+        yield token + " "
+        await asyncio.sleep(TOKEN_DELAY)
+    if fig is not None:
+        yield fig
+
+
+def stream_answer(question: str, retrieve, n_results: int = 3):
+    """
+    Sync generator over generate_answer(), for st.write_stream: the coroutine runs on
+    the backend loop and hands tokens over through a queue as they are produced.
+    """
+    tokens = queue.Queue()
+
+    async def pump():
+        try:
+            async for token in generate_answer(question, retrieve, n_results):
+                tokens.put(token)
+        except Exception as e:  # surface backend failures in the chat instead of hanging
+            tokens.put(f"\n\n⚠️ {e}")
+        finally:
+            tokens.put(_DONE)
+
+    future = asyncio.run_coroutine_threadsafe(pump(), _get_loop())
+    try:
+        while (token := tokens.get()) is not _DONE:
+            yield token
+    finally:
+        # the session went away mid-answer: stop generating
+        future.cancel()
+
+
+class PresetAnswers:
+    """
+    Ready-made (text, figure) answers for the quick questions, tagged with the data
+    version they were computed for. refresh() recomputes them on a background thread
+    whenever the version changes; until then get() returns None and the question is
+    answered the normal, streamed way.
+    """
+
+    def __init__(self):
+        self._answers = {}
+        self._version = None
+        self._lock = threading.Lock()
+
+    def get(self, question: str, version):
+        with self._lock:
+            return self._answers.get(question) if self._version == version else None
+
+    def refresh(self, questions, retrieve, version):
+        with self._lock:
+            if self._version == version:
+                return
+            self._version = version
+            self._answers = {}
+
+        def compute():
+            answers = {q: build_answer(q, retrieve) for q in questions}
+            with self._lock:
+                if self._version == version:  # a newer refresh may have started meanwhile
+                    self._answers = answers
+
+        threading.Thread(target=compute, name="floatchat-presets", daemon=True).start()
+
+
+# shared by every session
+preset_answers = PresetAnswers()
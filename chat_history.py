@@ -0,0 +1,76 @@
+import json
+import os
+import tempfile
+import time
+import uuid
+import weakref
+from collections import deque
+
+# messages kept in memory per session; older ones are spilled to disk
+RETENTION = int(os.environ.get("CHAT_RETENTION", 200))
+
+# messages rendered per "page" of the chat window
+PAGE_SIZE = 20
+
+SPILL_DIR = os.path.join(tempfile.gettempdir(), "floatchat")
+
+
+class ChatMessage:
+    __slots__ = ("role", "message", "ts", "figure")
+
+    def __init__(self, role: str, message: str, ts: float = None, figure=None):
+        self.role = role
+        self.message = message
+        self.ts = time.time() if ts is None else ts
+        # figures stay in memory only; spilled messages keep just their text
+        self.figure = figure
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+class ChatHistory:
+    """
+    One session's chat: the newest `retention` messages in a bounded deque of slotted
+    records, everything older appended to a per-session JSON-lines spill file
+    (deleted when the session's history is garbage-collected).
+    """
+
+    def __init__(self, retention: int = RETENTION, spill: bool = True):
+        self._recent = deque(maxlen=retention)
+        self._spilled = 0
+        self._spill_path = None
+        if spill:
+            self._spill_path = os.path.join(SPILL_DIR, f"{uuid.uuid4().hex}.jsonl")
+            weakref.finalize(self, _remove, self._spill_path)
+
+    def __len__(self):
+        return self._spilled + len(self._recent)
+
+    def append(self, role: str, message: str, figure=None):
+        if len(self._recent) == self._recent.maxlen:
+            oldest = self._recent[0]
+            if self._spill_path:
+                os.makedirs(SPILL_DIR, exist_ok=True)
+                with open(self._spill_path, "a") as f:
+                    f.write(json.dumps({"role": oldest.role, "message": oldest.message, "ts": oldest.ts}) + "\n")
+            self._spilled += 1
+        self._recent.append(ChatMessage(role, message, figure=figure))
+
+    def tail(self, n: int):
+        """The last n messages, oldest first; reads the spill file only if n reaches past memory."""
+        n = min(n, len(self))
+        if n <= len(self._recent):
+            return list(self._recent)[len(self._recent) - n:]
+        return self._read_spilled(n - len(self._recent)) + list(self._recent)
+
+    def _read_spilled(self, n: int):
+        if not self._spill_path or not os.path.exists(self._spill_path):
+            return []
+        with open(self._spill_path) as f:
+            lines = deque(f, maxlen=n)
+        return [ChatMessage(**json.loads(line)) for line in lines]
@@ -0,0 +1,217 @@
+import glob
+import json
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+import profile_store
+import sql_store
+from atomic_files import MtimeCache, save_json, save_npy
+from rollups import DEPTH_BANDS
+
+TILE_DIR = os.environ.get("CLIMATOLOGY_DIR", os.path.join("data", "climatology"))
+MANIFEST_FILE = "manifest.json"
+
+# grid cell size (degrees); cell (i, j) covers latitude -90 + i*CELL_DEG and
+# longitude -180 + j*CELL_DEG upwards
+CELL_DEG = 1.0
+N_LAT = int(round(180 / CELL_DEG))
+N_LON = int(round(360 / CELL_DEG))
+N_BANDS = len(DEPTH_BANDS) - 1
+
+# parameter axis of every tile, in this order
+PARAMS = list(profile_store.PARAM_COLUMNS)
+
+
+
+def _month_paths(month: str, out: str):
+    return os.path.join(out, f"{month}.sum.npy"), os.path.join(out, f"{month}.count.npy")
+
+
+def bin_month(rows):
+    """
+    Sums and counts of one month of measurements per (param, depth band, lat cell,
+    lon cell): float32 and int32 arrays of shape (params, bands, N_LAT, N_LON).
+    """
+    shape = (len(PARAMS), N_BANDS, N_LAT, N_LON)
+    sums = np.zeros(shape, dtype=np.float32)
+    counts = np.zeros(shape, dtype=np.int32)
+    if rows.empty:
+        return sums, counts
+    lat = rows["latitude"].to_numpy(dtype=np.float64)
+    lon = (rows["longitude"].to_numpy(dtype=np.float64) + 180) % 360
+    band = np.searchsorted(DEPTH_BANDS, rows["pressure"].to_numpy(dtype=np.float64), side="right") - 1
+    lat_i = np.clip(np.floor((lat + 90) / CELL_DEG), 0, N_LAT - 1).astype(np.int64)
+    lon_i = np.clip(np.floor(lon / CELL_DEG), 0, N_LON - 1).astype(np.int64)
+    valid = (band >= 0) & (band < N_BANDS) & ~np.isnan(lat) & ~np.isnan(lon)
+    # one flat cell number per measurement, then a bincount per parameter
+    cell = (band * N_LAT + lat_i) * N_LON + lon_i
+    size = N_BANDS * N_LAT * N_LON
+    for p, param in enumerate(PARAMS):
+        col = profile_store.PARAM_COLUMNS[param]
+        if col not in rows.columns:
+            continue
+        v = rows[col].to_numpy(dtype=np.float64)
+        ok = valid & ~np.isnan(v)
+        sums[p] = np.bincount(cell[ok], weights=v[ok], minlength=size).reshape(shape[1:])
+        counts[p] = np.bincount(cell[ok], minlength=size).reshape(shape[1:])
+    return sums, counts
+
+
+def build(root: str = profile_store.PROFILE_DIR, out: str = TILE_DIR, months=None):
+    """
+    Offline job: rebuilds the tiles of `months` ("YYYY-MM"; default: every month in
+    the profile store), one month chunk at a time, then rewrites the manifest.
+    Each chunk is a pair of .npy files, so readers memory-map only what they touch.
+    """
+    os.makedirs(out, exist_ok=True)
+    stored = sorted({os.path.basename(p).split("=", 1)[1]
+                     for p in glob.glob(os.path.join(root, "region=*", "month=*"))})
+    columns = ["latitude", "longitude", "pressure"] + profile_store.param_columns(PARAMS)
+    for month in (months or stored):
+        start = pd.Timestamp(f"{month}-01")
+        rows = sql_store.read(columns, root=root,
+                              date_range=[start, start + pd.offsets.MonthEnd(0)])
+        sums, counts = bin_month(rows)
+        sum_path, count_path = _month_paths(month, out)
+        save_npy(sum_path, sums)
+        save_npy(count_path, counts)
+
+    built = sorted(os.path.basename(p)[:-len(".sum.npy")]
+                   for p in glob.glob(os.path.join(out, "*.sum.npy")))
+    manifest = {"cell_deg": CELL_DEG, "params": PARAMS, "depth_bands": DEPTH_BANDS.tolist(),
+                "months": built}
+    save_json(os.path.join(out, MANIFEST_FILE), manifest)
+
+
+def exists(out: str = TILE_DIR):
+    return os.path.exists(os.path.join(out, MANIFEST_FILE))
+
+
+def version(out: str = TILE_DIR):
+    """Changes whenever the tiles are rebuilt; 0 if there are none."""
+    try:
+        return os.stat(os.path.join(out, MANIFEST_FILE)).st_mtime_ns
+    except OSError:
+        return 0
+
+
+def _bands(depth):
+    # depth bands overlapping a (min, max) pressure window, as for the rollups
+    if not depth:
+        return slice(None)
+    lo = np.searchsorted(DEPTH_BANDS, depth[0], side="right") - 1
+    hi = np.searchsorted(DEPTH_BANDS, depth[1], side="left") - 1
+    return slice(int(max(lo, 0)), int(max(hi, lo)) + 1)
+
+
+def _cells(lat_range, lon_range):
+    # (lat slice, lon index array) of the cells overlapping a window; lon may wrap
+    lat = slice(None)
+    if lat_range:
+        lo = int(np.clip(np.floor((lat_range[0] + 90) / CELL_DEG), 0, N_LAT - 1))
+        hi = int(np.clip(np.ceil((lat_range[1] + 90) / CELL_DEG), 1, N_LAT))
+        lat = slice(lo, max(hi, lo + 1))  # a zero-width window still covers its cell
+    if not lon_range:
+        return lat, np.arange(N_LON)
+    lo = int(np.floor((lon_range[0] + 180) / CELL_DEG)) % N_LON
+    if lon_range[0] == lon_range[1]:
+        return lat, np.array([lo])
+    hi = int(np.ceil((lon_range[1] + 180) / CELL_DEG)) % N_LON or N_LON
+    lon = np.arange(lo, hi) if lo < hi else np.r_[np.arange(lo, N_LON), np.arange(0, hi)]
+    return lat, lon
+
+
+class Climatology:
+    """
+    Memory-mapped month chunks of the climatology tiles. Aggregates add up sums and
+    counts over the requested months/bands/cells, so only those pages are read.
+    """
+
+    __slots__ = ("months", "_sums", "_counts")
+
+    def __init__(self, out: str = TILE_DIR):
+        with open(os.path.join(out, MANIFEST_FILE)) as f:
+            self.months = json.load(f)["months"]
+        self._sums, self._counts = {}, {}
+        for month in self.months:
+            sum_path, count_path = _month_paths(month, out)
+            self._sums[month] = np.load(sum_path, mmap_mode="r")
+            self._counts[month] = np.load(count_path, mmap_mode="r")
+
+    def select_months(self, date_range=None, last: int = None):
+        """Stored months inside a date range, or the latest `last` stored months."""
+        if last:
+            return self.months[-last:]
+        date_range = list(date_range or [])
+        if not date_range:
+            return list(self.months)
+        lo = pd.Timestamp(date_range[0]).strftime("%Y-%m")
+        hi = pd.Timestamp(date_range[-1]).strftime("%Y-%m") if len(date_range) > 1 else "9999-12"
+        return [m for m in self.months if lo <= m <= hi]
+
+    def _totals(self, param, months, depth, lat, lon):
+        p = PARAMS.index(param)
+        bands = _bands(depth)
+        total = count = 0
+        for month in months:
+            if month in self._sums:
+                total = total + self._sums[month][p, bands, lat][..., lon].sum(axis=0, dtype=np.float64)
+                count = count + self._counts[month][p, bands, lat][..., lon].sum(axis=0, dtype=np.int64)
+        return total, count
+
+    def mean(self, param, months, lat_range=None, lon_range=None, depth=None):
+        """Mean of one parameter over months x window x depth; NaN if nothing was measured."""
+        lat, lon = _cells(lat_range, lon_range)
+        total, count = self._totals(param, months, depth, lat, lon)
+        n = np.sum(count)
+        return float(np.sum(total) / n) if n else float("nan")
+
+    def mean_grid(self, param, months, lat_range=None, lon_range=None, depth=None, budget=None):
+        """
+        Per-cell means as a frame of lat, lon (cell centres), value, count and deg (cell
+        size); empty cells dropped. With a `budget`, neighbouring cells are merged into
+        k x k blocks (their sums and counts added up) until at most `budget` remain.
+        """
+        lat, lon = _cells(lat_range, lon_range)
+        total, count = self._totals(param, months, depth, lat, lon)
+        if np.ndim(count) < 2:
+            return pd.DataFrame(columns=["lat", "lon", "value", "count", "deg"])
+        lat_idx = np.arange(N_LAT)[lat]
+        k = 1
+        while True:
+            rows, cols = np.arange(0, len(lat_idx), k), np.arange(0, len(lon), k)
+            block_total = np.add.reduceat(np.add.reduceat(total, rows, axis=0), cols, axis=1)
+            block_count = np.add.reduceat(np.add.reduceat(count, rows, axis=0), cols, axis=1)
+            i, j = np.nonzero(block_count)
+            if not budget or len(i) <= budget:
+                break
+            k += max(1, int(k * (np.sqrt(len(i) / budget) - 1)))
+        # block centres; a block at the window's edge may hold fewer than k cells
+        lat_width = np.diff(np.r_[rows, len(lat_idx)])[i]
+        lon_width = np.diff(np.r_[cols, len(lon)])[j]
+        return pd.DataFrame({
+            "lat": -90 + (lat_idx[rows[i]] + lat_width / 2) * CELL_DEG,
+            "lon": ((lon[cols[j]] + lon_width / 2) * CELL_DEG) % 360 - 180,
+            "value": block_total[i, j] / block_count[i, j],
+            "count": block_count[i, j],
+            "deg": k * CELL_DEG,
+        })
+
+# keyed by manifest path, so unchanged tiles aren't re-opened on reruns
+_tiles = MtimeCache(lambda manifest: Climatology(os.path.dirname(manifest)))
+
+
+def load(out: str = TILE_DIR):
+    """The tiles as a Climatology, re-opened only when the manifest changes; None if not built."""
+    try:
+        return _tiles.get(os.path.join(out, MANIFEST_FILE))
+    except OSError:
+        return None
+
+
+if __name__ == "__main__":
+    # python climatology.py [YYYY-MM ...]  ->  rebuild all (or the given) month tiles
+    build(months=sys.argv[1:] or None)
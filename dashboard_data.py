@@ -0,0 +1,86 @@
+import pandas as pd
+import streamlit as st
+
+import profile_grid
+import profile_store
+import rollups
+import sql_store
+
+# distinct filter combinations kept per process (shared by all sessions)
+CACHE_ENTRIES = 256
+
+# interpolated grids kept per process; each holds every profile of one selection
+GRID_ENTRIES = 16
+
+# most measurement rows read into one grid
+GRID_MAX_ROWS = 2_000_000
+
+# shown until the profile store has been populated
+DEMO_TOTAL_PROFILES = 9178
+
+
+def filter_key(date_range, param, depth, region, lat_range, lon_range):
+    """
+    Normalized, hashable form of the dashboard filters, so equivalent widget states
+    (e.g. the same parameters picked in a different order) share one cache entry.
+    """
+    dates = tuple(pd.Timestamp(d).date().isoformat() for d in (date_range or []))
+    return (dates, tuple(sorted(param)), tuple(depth), region, tuple(lat_range), tuple(lon_range))
+
+
+def data_version():
+    """Part of every cache key: new ingests, rollups or database rebuilds make old entries unreachable."""
+    return profile_store.version(), rollups.version(), sql_store.version()
+
+
+@st.cache_data(max_entries=CACHE_ENTRIES, show_spinner=False)
+def overview(key, version):
+    """
+    Overview card data for one filter state: Total Profiles and the monthly means
+    (None when there are no rollups yet). Computed once per (filters, data version)
+    for everyone; the least recently used entries are evicted past CACHE_ENTRIES.
+    """
+    date_range, param, depth, region, lat_range, lon_range = key
+    filters = dict(date_range=date_range, depth=depth, region=region, lat_range=lat_range, lon_range=lon_range)
+    monthly = None
+    if rollups.exists():
+        # both come from the small rollup tables, so no filter state scans measurements
+        total = rollups.total_profiles(**filters)
+        monthly = rollups.monthly_means(param, region=region, depth=depth, date_range=date_range)
+    elif sql_store.fresh():
+        total = sql_store.count_profiles(**filters)
+    elif profile_store.exists():
+        total = len(profile_store.read_profiles(columns=["float_id", "cycle"], **filters).drop_duplicates())
+    else:
+        total = DEMO_TOTAL_PROFILES
+    return {"total_profiles": total, "monthly": monthly}
+
+
+def grid_key(key):
+    """filter_key() without the depth window: depth changes only slice the grid."""
+    date_range, param, depth, region, lat_range, lon_range = key
+    return date_range, param, region, lat_range, lon_range
+
+
+@st.cache_resource(max_entries=GRID_ENTRIES, show_spinner=False)
+def profile_grid_for(key, version):
+    """
+    Profiles of one selection (a grid_key()) interpolated onto the standard pressure
+    levels, or None before the profile data exists. Past GRID_MAX_ROWS measurements
+    only whole profiles up to the limit are kept and the grid is marked truncated.
+    Built once per (selection, data version) and shared read-only, so it is cached
+    as a resource rather than copied.
+    """
+    if not (sql_store.exists() or profile_store.exists()):
+        return None
+    date_range, param, region, lat_range, lon_range = key
+    columns = profile_store.param_columns(param)
+    rows = sql_store.read(["float_id", "cycle", "time", "latitude", "longitude", "pressure"] + columns,
+                          limit=GRID_MAX_ROWS + 1, whole_profiles=True, date_range=date_range,
+                          region=region, lat_range=lat_range, lon_range=lon_range)
+    truncated = len(rows) > GRID_MAX_ROWS
+    if truncated:
+        # stop at a profile boundary: drop the profile the row limit cut into
+        last = rows.iloc[-1]
+        rows = rows[(rows["float_id"] != last["float_id"]) | (rows["cycle"] != last["cycle"])]
+    return profile_grid.build(rows, columns, truncated=truncated)
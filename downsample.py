@@ -0,0 +1,98 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+# most points sent to the browser per map / per chart
+MAP_POINT_BUDGET = int(os.environ.get("MAP_POINT_BUDGET", 5000))
+SERIES_POINT_BUDGET = int(os.environ.get("SERIES_POINT_BUDGET", 2000))
+
+
+def lttb(x, y, n_out: int):
+    """
+    Largest-Triangle-Three-Buckets: indices of n_out points that keep the visual
+    shape of the series (peaks and dips survive). First and last points are always kept.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n = len(x)
+    if n_out >= n or n <= 2:
+        return np.arange(n)
+    if n_out < 3:
+        return np.array([0, n - 1])
+
+    # n_out - 2 buckets between the fixed first and last points
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.intp)
+    idx = np.empty(n_out, dtype=np.intp)
+    idx[0], idx[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        nlo = hi
+        nhi = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x, avg_y = x[nlo:nhi].mean(), y[nlo:nhi].mean()
+        # area of the triangle (previous pick, candidate, next bucket's average)
+        area = np.abs((x[a] - avg_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y - y[a]))
+        a = lo + int(np.argmax(area))
+        idx[i + 1] = a
+    return idx
+
+
+def downsample_series(frame, budget: int = SERIES_POINT_BUDGET):
+    """
+    Trims a chart frame (index = x axis, one column per line) to about `budget` rows,
+    keeping the union of each column's LTTB picks.
+    """
+    if len(frame) <= budget:
+        return frame
+    index = frame.index
+    if pd.api.types.is_datetime64_any_dtype(index):
+        x = index.asi8.astype(np.float64)
+    elif pd.api.types.is_numeric_dtype(index):
+        x = index.to_numpy(dtype=np.float64)
+    else:
+        x = np.arange(len(frame), dtype=np.float64)
+    per_column = max(3, budget // max(1, frame.shape[1]))
+    keep = set()
+    for col in frame.columns:
+        y = frame[col].to_numpy(dtype=np.float64)
+        ok = np.flatnonzero(~np.isnan(y))
+        keep.update(ok[lttb(x[ok], y[ok], per_column)].tolist())
+    return frame.iloc[sorted(keep)]
+
+
+def bin_points(frame, lat_range, lon_range, budget: int = MAP_POINT_BUDGET,
+               lat_col: str = "lat", lon_col: str = "lon"):
+    """
+    Zoom-aware clustering for st.map: points in the visible lat/lon window are snapped
+    to a grid sized so there are at most `budget` occupied cells, and each is sent as
+    one point at its members' centroid with a `count` (no point is dropped). Zooming
+    in (narrower ranges) gives finer cells. Frames already within budget are returned
+    unchanged, without a `count` column.
+    """
+    if len(frame) <= budget:
+        return frame
+    lat = frame[lat_col].to_numpy(dtype=np.float64)
+    lon = frame[lon_col].to_numpy(dtype=np.float64)
+    lat_ext = max(float(lat_range[1] - lat_range[0]), 1e-6)
+    lon_ext = max(float((lon_range[1] - lon_range[0]) % 360 or 360), 1e-6)
+    cell = np.sqrt(lat_ext * lon_ext / budget)
+
+    while True:
+        rows = np.floor((lat - lat_range[0]) / cell).astype(np.int64)
+        cols = np.floor(((lon - lon_range[0]) % 360) / cell).astype(np.int64)
+        cells, inverse, counts = np.unique(rows * (int(lon_ext / cell) + 2) + cols,
+                                           return_inverse=True, return_counts=True)
+        if len(cells) <= budget:
+            break
+        # the window's grid can hold more occupied cells than the budget (cells
+        # straddle its edges); coarsen until every cluster fits instead of dropping any
+        cell *= max(np.sqrt(len(cells) / budget), 1.1)
+    out = pd.DataFrame({
+        lat_col: np.bincount(inverse, weights=lat) / counts,
+        # average longitudes relative to the window edge so clusters don't split at ±180
+        lon_col: ((np.bincount(inverse, weights=(lon - lon_range[0]) % 360) / counts
+                   + lon_range[0] + 180) % 360) - 180,
+        "count": counts,
+    })
+    return out
@@ -0,0 +1,231 @@
+import hashlib
+import json
+import os
+import time
+
+import numpy as np
+
+from atomic_files import replacing, save_json, save_npy
+from embeddings import BATCH_SIZE, MODEL_NAME, embed_texts, get_model
+from vector_index import assign_lists, default_n_lists, train_centroids
+
+STORE_VERSION = 2
+STORE_DIR = os.environ.get("EMBEDDING_STORE_DIR", "embeddings_cache")
+
+# compact() once this share of stored rows is dead
+COMPACT_RATIO = 0.25
+
+
+def text_hash(text: str) -> bytes:
+    """Fixed-width key for one description; equal texts share one stored embedding."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:32].encode("ascii")
+
+
+class EmbeddingStore:
+    """
+    Append-only on-disk embeddings for one model, in <store_dir>/<model>/:
+
+        manifest.json          store version, model, dim and the ordered segment list
+        seg-00000.npy          L2-normalized float32 embeddings, never modified once written
+        seg-00000.keys.npy     text_hash() of each row in that segment
+        tombstones.npy         global row ids whose description has gone away
+        ivf-centroids.npy      k-means centroids for IVF search (built on first use)
+        ivf-lists.npy          IVF list of each global row
+
+    Segments are opened with np.load(mmap_mode="r"), so restarts are nearly free and
+    worker processes share the same pages. sync() only encodes descriptions whose hash
+    isn't stored yet. Meant to have one writer at a time (the app or the nightly job).
+    """
+
+    def __init__(self, model_name: str = MODEL_NAME, store_dir: str = STORE_DIR):
+        self.model_name = model_name
+        self.path = os.path.join(store_dir, model_name.replace("/", "__"))
+        self.dim = None
+        self.segment_names = []
+        self.segments = []
+        self.keys = np.empty(0, dtype="S32")
+        self.tombstones = np.empty(0, dtype=np.int64)
+        self._load()
+
+    # ---------- reading ----------
+    def _load(self):
+        try:
+            with open(os.path.join(self.path, "manifest.json")) as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return
+        if manifest.get("version") != STORE_VERSION or manifest.get("model") != self.model_name:
+            # written by an older layout or another model: start over
+            return
+        self.dim = manifest["dim"]
+        self.segment_names = list(manifest["segments"])
+        self.segments = [np.load(os.path.join(self.path, n + ".npy"), mmap_mode="r")
+                         for n in self.segment_names]
+        keys = [np.load(os.path.join(self.path, n + ".keys.npy")) for n in self.segment_names]
+        if keys:
+            self.keys = np.concatenate(keys)
+        tomb_path = os.path.join(self.path, "tombstones.npy")
+        if os.path.exists(tomb_path):
+            self.tombstones = np.load(tomb_path)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def _live_mask(self):
+        live = np.ones(len(self.keys), dtype=bool)
+        live[self.tombstones] = False
+        return live
+
+    def live_rows(self):
+        """Maps key -> global row id for every row that isn't tombstoned."""
+        live = self._live_mask()
+        return {k: i for i, k in enumerate(self.keys.tolist()) if live[i]}
+
+    def ivf_lists(self, n_lists: int = None, train_size: int = 100_000, n_iter: int = 10, seed: int = 0):
+        """
+        (centroids, lists) for IVFIndex over the segments, persisted next to them so
+        restarts and other workers don't retrain. Centroids are trained once from a
+        sample of rows; rows appended later are only assigned to the existing lists.
+        compact() renumbers rows, so it drops both files and the next call retrains.
+        """
+        centroids_path = os.path.join(self.path, "ivf-centroids.npy")
+        lists_path = os.path.join(self.path, "ivf-lists.npy")
+        centroids = lists = None
+        if os.path.exists(centroids_path) and os.path.exists(lists_path):
+            centroids, lists = np.load(centroids_path), np.load(lists_path)
+            if centroids.shape[1] != self.dim or len(lists) > len(self.keys):
+                centroids = lists = None
+        if centroids is None:
+            live = len(self.keys) - len(self.tombstones)
+            centroids = train_centroids(self.segments, n_lists or default_n_lists(live), train_size, n_iter, seed)
+            lists = np.empty(0, dtype=np.int32)
+            save_npy(centroids_path, centroids)
+        if len(lists) < len(self.keys):
+            lists = np.concatenate([lists, assign_lists(self.segments, centroids, start=len(lists))])
+            save_npy(lists_path, lists)
+        return centroids, lists
+
+    # ---------- writing ----------
+    def _write_manifest(self):
+        os.makedirs(self.path, exist_ok=True)
+        manifest = {
+            "version": STORE_VERSION,
+            "model": self.model_name,
+            "dim": self.dim,
+            "segments": self.segment_names,
+            "rows": len(self.keys),
+            "tombstones": len(self.tombstones),
+            "updated": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        }
+        save_json(os.path.join(self.path, "manifest.json"), manifest, indent=2)
+
+    def _next_segment_name(self):
+        last = int(self.segment_names[-1].split("-")[1]) if self.segment_names else -1
+        return f"seg-{last + 1:05d}"
+
+    def _append_segment(self, texts, keys, batch_size, progress):
+        os.makedirs(self.path, exist_ok=True)
+        if self.dim is None:
+            self.dim = get_model(self.model_name).get_sentence_embedding_dimension()
+        name = self._next_segment_name()
+        npy_path = os.path.join(self.path, name + ".npy")
+        with replacing(npy_path) as tmp:
+            out = np.lib.format.open_memmap(tmp, mode="w+", dtype=np.float32, shape=(len(texts), self.dim))
+            embed_texts(texts, batch_size=batch_size, progress=progress, out=out,
+                        model_name=self.model_name, normalize=True)
+            out.flush()
+            del out
+        keys = np.array(keys, dtype="S32")
+        save_npy(os.path.join(self.path, name + ".keys.npy"), keys)
+
+        self.segment_names.append(name)
+        self.segments.append(np.load(npy_path, mmap_mode="r"))
+        self.keys = np.concatenate([self.keys, keys])
+
+    def sync(self, texts, batch_size: int = BATCH_SIZE, progress=None):
+        """
+        Brings the store up to date with `texts` (the current description column):
+        new or changed descriptions are encoded and appended as one new segment,
+        rows whose description disappeared are tombstoned.
+        Returns the global row id of each text, in order.
+        """
+        texts = list(texts)
+        keys = [text_hash(t) for t in texts]
+        rows = self.live_rows()
+
+        new_texts, new_keys, seen = [], [], set()
+        for t, k in zip(texts, keys):
+            if k not in rows and k not in seen:
+                seen.add(k)
+                new_texts.append(t)
+                new_keys.append(k)
+
+        wanted = set(keys)
+        dead = [i for k, i in rows.items() if k not in wanted]
+
+        if new_texts:
+            start = len(self.keys)
+            self._append_segment(new_texts, new_keys, batch_size, progress)
+            rows.update((k, start + j) for j, k in enumerate(new_keys))
+        if dead:
+            self.tombstones = np.union1d(self.tombstones, np.array(dead, dtype=np.int64))
+            save_npy(os.path.join(self.path, "tombstones.npy"), self.tombstones)
+        if new_texts or dead:
+            self._write_manifest()
+            if len(self.tombstones) > COMPACT_RATIO * len(self.keys):
+                self.compact()
+                rows = self.live_rows()
+
+        return np.fromiter((rows[k] for k in keys), dtype=np.intp, count=len(keys))
+
+    def compact(self):
+        """Rewrites all live rows into a single segment and clears the tombstones."""
+        live = self._live_mask()
+        vectors = np.concatenate(self.segments)[live]
+        keys = self.keys[live]
+
+        name = self._next_segment_name()
+        save_npy(os.path.join(self.path, name + ".npy"), vectors)
+        save_npy(os.path.join(self.path, name + ".keys.npy"), keys)
+        old = self.segment_names
+
+        self.segment_names = [name]
+        self.segments = [np.load(os.path.join(self.path, name + ".npy"), mmap_mode="r")]
+        self.keys = keys
+        self.tombstones = np.empty(0, dtype=np.int64)
+        save_npy(os.path.join(self.path, "tombstones.npy"), self.tombstones)
+        self._write_manifest()
+
+        # other processes may still have the old segments mapped; on POSIX that's fine
+        stale = [n + suffix for n in old for suffix in (".npy", ".keys.npy")]
+        for name in stale + ["ivf-centroids.npy", "ivf-lists.npy"]:
+            try:
+                os.remove(os.path.join(self.path, name))
+            except OSError:
+                pass
+
+
+def load_or_build(texts, model_name: str = MODEL_NAME, store_dir: str = STORE_DIR,
+                  batch_size: int = BATCH_SIZE, progress=None):
+    """
+    Syncs the store with `texts`, encoding only what isn't stored yet.
+    Returns (store, positions): the store (its memory-mapped `segments`, and
+    ivf_lists() for large catalogs) and, for each text, its row in the segments.
+    """
+    store = EmbeddingStore(model_name, store_dir)
+    positions = store.sync(texts, batch_size=batch_size, progress=progress)
+    return store, positions
+
+
+if __name__ == "__main__":
+    # nightly refresh: python embedding_store.py catalog.csv  (needs a `description` column)
+    import sys
+
+    import pandas as pd
+
+    from embeddings import print_progress
+
+    descriptions = pd.read_csv(sys.argv[1], usecols=["description"])["description"].astype(str)
+    store = EmbeddingStore()
+    store.sync(descriptions.tolist(), progress=print_progress)
+    print(f"{len(store)} rows stored, {len(store.tombstones)} tombstoned")
@@ -0,0 +1,197 @@
+import itertools
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+from sentence_transformers import SentenceTransformer
+
+MODEL_NAME = "all-MiniLM-L6-v2"
+BATCH_SIZE = 256
+QUERY_CACHE_SIZE = 4096
+
+# Loaded models live at module level, so they survive Streamlit reruns and are
+# shared by every session served from this process.
+_models = {}
+_load_seconds = {}
+_warmed = set()
+_lock = threading.Lock()
+
+
+def get_model(name: str = MODEL_NAME):
+    """
+    Returns the SentenceTransformer for `name`, loading it only once per process.
+    """
+    model = _models.get(name)
+    if model is None:
+        with _lock:
+            # another session may have loaded it while we waited
+            model = _models.get(name)
+            if model is None:
+                start = time.perf_counter()
+                model = SentenceTransformer(name)
+                _load_seconds[name] = time.perf_counter() - start
+                _models[name] = model
+                print(f"Loaded embedding model {name} in {_load_seconds[name]:.2f}s")
+    return model
+
+
+def load_seconds(name: str = MODEL_NAME):
+    """Seconds it took to load `name`, or None if it hasn't been loaded yet."""
+    return _load_seconds.get(name)
+
+
+def warm_up(name: str = MODEL_NAME):
+    """
+    Loads the model and runs one throwaway encode so the first real query
+    doesn't pay for it. Call this when the server starts; later calls are no-ops.
+    """
+    if name not in _warmed:
+        get_model(name).encode(["warm up"])
+        _warmed.add(name)
+    return load_seconds(name)
+
+
+def _batches(texts, batch_size):
+    it = iter(texts)
+    while batch := list(itertools.islice(it, batch_size)):
+        yield batch
+
+
+def print_progress(done, total):
+    """Console progress callback for embed_texts()."""
+    if total:
+        print(f"\rEmbedded {done}/{total} ({done / total:.0%})", end="\n" if done >= total else "", flush=True)
+    else:
+        print(f"\rEmbedded {done}", end="", flush=True)
+
+
+def embed_texts(texts, batch_size: int = BATCH_SIZE, progress=None, out=None,
+                model_name: str = MODEL_NAME, normalize: bool = False):
+    """
+    Encodes `texts` (any iterable of strings) in batches of `batch_size` and returns
+    a float32 matrix with one row per text.
+
+    progress: optional callback progress(done, total); total is None when `texts`
+              has no len().
+    out:      optional preallocated float32 array (e.g. a np.memmap) to write into.
+    normalize: scale every embedding to unit length.
+    """
+    model = get_model(model_name)
+    dim = model.get_sentence_embedding_dimension()
+    total = len(texts) if hasattr(texts, "__len__") else None
+    if out is None and total is not None:
+        out = np.empty((total, dim), dtype=np.float32)
+
+    chunks = []
+    done = 0
+    for batch in _batches(texts, batch_size):
+        emb = model.encode(batch, batch_size=batch_size, convert_to_numpy=True,
+                           normalize_embeddings=normalize).astype(np.float32, copy=False)
+        if out is not None:
+            out[done:done + len(batch)] = emb
+        else:
+            chunks.append(emb)
+        done += len(batch)
+        if progress is not None:
+            progress(done, total)
+
+    if out is None:
+        return np.concatenate(chunks) if chunks else np.empty((0, dim), dtype=np.float32)
+    return out[:done]
+
+
+class QueryCache:
+    """
+    Thread-safe LRU of query text -> embedding, with an optional TTL in seconds.
+    Counts hits and misses so the hit rate can be shown on a dashboard.
+    """
+
+    def __init__(self, maxsize: int = QUERY_CACHE_SIZE, ttl: float = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and (self.ttl is None or time.monotonic() - entry[1] < self.ttl):
+                self._data.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            if entry is not None:
+                del self._data[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = (value, time.monotonic())
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def __contains__(self, key):
+        # presence check that doesn't touch the hit/miss counters or LRU order
+        with self._lock:
+            entry = self._data.get(key)
+            return entry is not None and (self.ttl is None or time.monotonic() - entry[1] < self.ttl)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._data)
+
+    @property
+    def hit_rate(self):
+        with self._lock:
+            return self._hit_rate()
+
+    def _hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats(self):
+        """One consistent snapshot of the size and hit/miss counters."""
+        with self._lock:
+            return {"size": len(self._data), "hits": self.hits, "misses": self.misses,
+                    "hit_rate": self._hit_rate()}
+
+
+# shared by every session in this process
+query_cache = QueryCache()
+
+
+def _query_key(query: str, model_name: str):
+    # collapse whitespace so "Plot  temperature " and "Plot temperature" share an entry
+    return model_name, " ".join(query.split())
+
+
+def encode_query(query: str, model_name: str = MODEL_NAME):
+    """Normalized float32 embedding of one query, served from query_cache when possible."""
+    key = _query_key(query, model_name)
+    emb = query_cache.get(key)
+    if emb is None:
+        emb = get_model(model_name).encode([key[1]], convert_to_numpy=True,
+                                           normalize_embeddings=True)[0].astype(np.float32)
+        emb.setflags(write=False)
+        query_cache.put(key, emb)
+    return emb
+
+
+def prewarm_queries(queries, model_name: str = MODEL_NAME):
+    """Encodes `queries` in one batch and seeds query_cache with them."""
+    queries = [q for q in queries if _query_key(q, model_name) not in query_cache]
+    if not queries:
+        return
+    embs = embed_texts([_query_key(q, model_name)[1] for q in queries], model_name=model_name, normalize=True)
+    for q, emb in zip(queries, embs):
+        emb.setflags(write=False)
+        query_cache.put(_query_key(q, model_name), emb)
+
+
+if __name__ == "__main__":
+    # `python embeddings.py` downloads/caches the weights ahead of `streamlit run`
+    warm_up()
@@ -1,16 +1,36 @@
+import json
+import time
+
 import streamlit as st
 import pandas as pd
 import numpy as np
 import plotly.express as px
-from sentence_transformers import SentenceTransformer
 
-# Example DataFrame
-df = pd.DataFrame({
+import climatology
+import dashboard_data
+import downsample
+import embedding_store
+import profile_store
+import profiler
+from chat_backend import preset_answers, stream_answer
+from chat_history import PAGE_SIZE as CHAT_PAGE_SIZE, ChatHistory
+from embeddings import encode_query, get_model, prewarm_queries, print_progress, query_cache, warm_up
+from metadata_index import MetadataIndex
+from query_planner import PLACES
+from spatial_index import GridIndex
+from vector_index import SearchResult, make_index
+
+_rerun_start = time.perf_counter()
+
+# Example DataFrame (treated as read-only once the app starts)
+profiles_df = pd.DataFrame({
     'latitude': [0, 1, 2],
     'longitude': [70, 71, 72],
     'salinity': [35, 35.1, 34.9],
     'temperature': [22, 22.5, 21.8],
     'time': ['2023-03-01']*3,
+    'pressure': [0, 10, 20],
+    'region': ['Indian Ocean']*3,
     'description': [
         "Surface water profile near 70°E",
         "10m depth reading in the Indian Ocean",
@@ -18,71 +38,129 @@ df = pd.DataFrame({
     ]
 })
 
-# 1️⃣ Initialize embedding model (only once)
-model = SentenceTransformer("all-MiniLM-L6-v2")
+# Latest known float positions (drive the live map and the nearest-float tile)
+floats_df = pd.DataFrame({
+    'float_id': [4901234, 4901235, 4901236, 4901237],
+    'lat': [-5, 10, -15, 5],
+    'lon': [70, 80, 60, 90],
+})
+
+# live map styling: float markers (point radius in metres) drawn over the climatology cells
+FLOAT_COLOR = "#7cf9d6"
+MAP_FLOAT_SIZE = 40_000
+
+# FloatChat quick questions (their embeddings are cached up front)
+preset_questions = [
+    "Show both chlorophyll and oxygen levels vs depth.",
+    "Plot temperature vs depth for floats around 70°E longitude.",
+    "Give me metadata about float 4901234.",
+]
+
+# 1️⃣ Initialize embedding model (once per process, shared by all sessions/reruns)
+with profiler.section("model/warm_up"):
+    warm_up()
+    model = get_model()
+    prewarm_queries(preset_questions)
+
+# Precompute embeddings for descriptions (batched) into one normalized float32 matrix.
+# They're persisted on disk and memory-mapped, so restarts and other workers reuse them.
+# Only descriptions that aren't in the store yet get encoded.
+@st.cache_resource
+def load_embedding_index():
+    store, positions = embedding_store.load_or_build(
+        profiles_df["description"].tolist(), progress=print_progress
+    )
+    # exact search for small catalogs, IVF approximate search for large ones (SEARCH_BACKEND);
+    # IVF searches the mmapped segments with centroids/lists persisted in the store
+    return make_index(store.segments, normalized=True, positions=positions, ivf_lists=store.ivf_lists)
+
+with profiler.section("model/embedding_index"):
+    embedding_index = load_embedding_index()
+
+# Sorted/grouped indexes over the metadata columns, for pre-filtering
+@st.cache_resource
+def load_metadata_index():
+    return MetadataIndex(profiles_df)
+
+metadata_index = load_metadata_index()
 
-# Precompute embeddings for descriptions
-df["embedding"] = df["description"].apply(lambda x: model.encode([x])[0])
+# Lat/lon grid over float positions for bounding-box and nearest-float lookups
+@st.cache_resource
+def load_float_index():
+    return GridIndex(floats_df["lat"], floats_df["lon"])
+
+float_index = load_float_index()
 
 # 2️⃣ Pandas-based query (replacing Chroma)
-def pandas_query(query: str, n_results: int = 5):
+@profiler.timed("query/pandas_query")
+def pandas_query(query: str, n_results: int = 5, lat_range=None, lon_range=None,
+                 date_range=None, depth=None, region=None):
     """
     Mimics Chroma query but uses pandas DataFrame.
-    Returns top n_results rows most similar to query.
+    Returns a SearchResult for the top n_results rows most similar to query;
+    call .to_frame() on it to get the rows themselves.
+    The optional filters (same shape as the dashboard widgets) narrow the
+    candidate rows before any similarity is computed.
     """
-    query_emb = model.encode([query])[0]
+    with profiler.section("query/encode"):
+        query_emb = encode_query(query)  # LRU-cached across sessions
+
+    candidates = metadata_index.select(lat_range=lat_range, lon_range=lon_range,
+                                       date_range=date_range, depth=depth, region=region)
 
-    def cosine_similarity(a, b):
-        return np.dot(a, b) / (np.linalg.norm(a) * np.linalg.norm(b))
+    # one matrix-vector product + argpartition instead of a per-row cosine loop
+    rows, scores = embedding_index.search(query_emb, n_results, candidates=candidates)
 
-    df["similarity"] = df["embedding"].apply(lambda x: cosine_similarity(query_emb, x))
+    return SearchResult(profiles_df, rows, scores)
 
-    return df.sort_values(by="similarity", ascending=False).head(n_results)
 
 
 
+# Precompute the quick-question answers; recomputed in the background whenever the data version changes
+preset_answers.refresh(preset_questions, pandas_query, dashboard_data.data_version())
 
 # --- Initialize Session State ---
 if "chat_history" not in st.session_state:
-    st.session_state.chat_history = []
+    st.session_state.chat_history = ChatHistory()
 
 # Custom CSS for styling tabs like your image
-st.markdown(
-    """
-    <style>
-    /* Center the tabs */
-    div[data-baseweb="tab-list"] {
-        display: flex;
-        justify-content: center;
-        background: rgba(255, 255, 255, 0.08); /* transparent white */
-        backdrop-filter: blur(10px);           /* blur effect */
-        -webkit-backdrop-filter: blur(10px);   /* for Safari */
-        padding: 8px;
-        border-radius: 25px;
-        border: 1px solid black;
-        gap: 10px;
-        width:70%;
-        margin-left:15%;
-    }
-
-    /* Default tab */
-    button[data-baseweb="tab"] {
-        color: white !important;
-        font-weight: 600 !important;
-        border-radius: 20px !important;
-        padding: 6px 16px !important;
-        background: transparent !important;
-    }
-
-    /* Active tab */
-    button[data-baseweb="tab"][aria-selected="true"] {
-        background-color: black !important;
-        color: white !important;
-    }
-    </style>
-    """,
-    unsafe_allow_html=True
-)
+with profiler.section("css/tabs"):
+    st.markdown(
+        """
+        <style>
+        /* Center the tabs */
+        div[data-baseweb="tab-list"] {
+            display: flex;
+            justify-content: center;
+            background: rgba(255, 255, 255, 0.08); /* transparent white */
+            backdrop-filter: blur(10px);           /* blur effect */
+            -webkit-backdrop-filter: blur(10px);   /* for Safari */
+            padding: 8px;
+            border-radius: 25px;
+            border: 1px solid black;
+            gap: 10px;
+            width:70%;
+            margin-left:15%;
+        }
+
+        /* Default tab */
+        button[data-baseweb="tab"] {
+            color: white !important;
+            font-weight: 600 !important;
+            border-radius: 20px !important;
+            padding: 6px 16px !important;
+            background: transparent !important;
+        }
+
+        /* Active tab */
+        button[data-baseweb="tab"][aria-selected="true"] {
+            background-color: black !important;
+            color: white !important;
+        }
+        </style>
+        """,
+        unsafe_allow_html=True
+    )
 
 # Tabs
 table_home, table_dashboard, table_chat, table_contact, table_team = st.tabs(
@@ -107,7 +185,9 @@ table_home, table_dashboard, table_chat, table_contact, table_team = st.tabs(
 # =========================
 # HOME TAB WITH BACKGROUND
 # =========================
-with table_home:
+@st.fragment
+@profiler.timed("tab/home")
+def render_home():
 
  st.markdown("""
  <style>
@@ -235,12 +315,17 @@ with table_home:
 
 
  
+
+with table_home:
+    render_home()
 
 
 
 
 # --- Contact Tab ---
-with table_contact:
+@st.fragment
+@profiler.timed("tab/contact")
+def render_contact():
     st.markdown("<style> body { background-color: #0d001a; color: white; } </style>", unsafe_allow_html=True)
     
     st.markdown("""
@@ -305,41 +390,74 @@ with table_contact:
 
             if submit_button:
                 st.success("Thanks for reaching out! We'll get back to you soon.")
-with table_chat:
+
+with table_contact:
+    render_contact()
+
+@st.fragment
+@profiler.timed("tab/chat")
+def render_chat():
     st.markdown("<h1 style='text-align:left;'>FloatChat</h1>", unsafe_allow_html=True)
 
     if "placeholder_text" not in st.session_state:
         st.session_state.placeholder_text = "Type your message..."
 
     if "chat_history" not in st.session_state:
-        st.session_state.chat_history = []
+        st.session_state.chat_history = ChatHistory()
+
+    # how many of the latest messages to render; "Show older" adds a page
+    if "chat_visible" not in st.session_state:
+        st.session_state.chat_visible = CHAT_PAGE_SIZE
 
     # Make the chat area wider with columns
     chat_col, _ = st.columns([4, 1])  # 4:1 width ratio
 
     with chat_col:
-        # Display chat history messages
-        for chat in st.session_state.chat_history:
-            if chat["role"] == "user":
+        # Display only the visible tail of the chat history
+        history = st.session_state.chat_history
+        if len(history) > st.session_state.chat_visible:
+            if st.button(f"Show older messages ({len(history) - st.session_state.chat_visible} more)"):
+                st.session_state.chat_visible += CHAT_PAGE_SIZE
+                st.rerun(scope="fragment")
+        for chat in history.tail(st.session_state.chat_visible):
+            if chat.role == "user":
                 with st.chat_message("user"):
-                    st.markdown(chat["message"])
+                    st.markdown(chat.message)
             else:
                 with st.chat_message("assistant"):
-                    st.markdown(chat["message"])
+                    st.markdown(chat.message)
+                    if chat.figure is not None:
+                        st.plotly_chart(chat.figure, use_container_width=True)
+
+        # Answer the pending question, streaming tokens in as the backend produces them
+        if question := st.session_state.pop("pending_question", None):
+            st.session_state.chat_history.append("user", question)
+            with st.chat_message("user"):
+                st.markdown(question)
+            with st.chat_message("assistant"):
+                with profiler.section("chat/answer"):
+                    preset = preset_answers.get(question, dashboard_data.data_version())
+                    if preset is not None:
+                        # precomputed quick-question answer: no retrieval, no streaming
+                        answer, figure = preset
+                        st.markdown(answer)
+                        if figure is not None:
+                            st.plotly_chart(figure, use_container_width=True)
+                    else:
+                        streamed = st.write_stream(stream_answer(question, pandas_query))
+                        parts = streamed if isinstance(streamed, list) else [streamed]
+                        answer = "".join(p for p in parts if isinstance(p, str))
+                        figure = next((p for p in parts if not isinstance(p, str)), None)
+            st.session_state.chat_history.append("bot", answer, figure=figure)
+            st.session_state.placeholder_text = "Ask a Follow-up..."
 
     # --- Chat input ---
     if user_input := st.chat_input(st.session_state.placeholder_text):
-        st.session_state.chat_history.append({"role": "user", "message": user_input})
-        st.session_state.chat_history.append({"role": "bot", "message": "🤖 I'm just a demo bot!"})
-        st.session_state.placeholder_text = "Ask a Follow-up..."
+        st.session_state.pending_question = user_input
+        st.rerun(scope="fragment")
 
     # --- Prebuilt Questions Section ---
     st.markdown(" Quick Questions")
-    preset_questions = [
-        "Show both chlorophyll and oxygen levels vs depth.",
-        "Plot temperature vs depth for floats around 70°E longitude.",
-        "Give me metadata about float 4901234.",
-    ]
 
     # Show buttons in a row
     button_per_row = 2
@@ -349,12 +467,15 @@ with table_chat:
             if (i + j) < len(preset_questions):
                 q = preset_questions[i + j]
                 if col.button(q):
-                    st.session_state.chat_history.append({"role": "user", "message": q})
-                    st.session_state.chat_history.append({"role": "bot", "message": f"🤖 Answer to: {q}"})
-                    st.session_state.placeholder_text = "Ask a Follow-up..."
-                    st.rerun()
+                    st.session_state.pending_question = q
+                    st.rerun(scope="fragment")
 
-with table_team:
+with table_chat:
+    render_chat()
+
+@st.fragment
+@profiler.timed("tab/team")
+def render_team():
     st.markdown("<h1 style='text-align:center; color:white;'>Our Team</h1>", unsafe_allow_html=True)
 
     # --- Custom CSS for Team Cards ---
@@ -452,6 +573,9 @@ with table_team:
                     unsafe_allow_html=True
                 )
 
+with table_team:
+    render_team()
+
 
 
 
@@ -463,49 +587,265 @@ with table_team:
 
 
 
-st.markdown(
-    """
-    <style>
-    .stApp {
-        /* Deep ocean gradient */
-        background: radial-gradient(
-            circle at center bottom,
-            rgba(124, 249, 214, 0.6) 0%,
-            rgba(111, 238, 183, 0.3) 20%,
-            rgba(127, 204, 182, 0.15) 40%,
-            rgba(0, 40, 60, 0.9) 80%,
-            rgba(0, 20, 30, 1) 100%
-        ),
-        linear-gradient(to top, rgba(0, 40, 60, 0.9), rgba(0, 0, 0, 0.95));
-        
-        background-size: cover;
-        background-attachment: fixed;
-        color: #ffffff;
-    }
-
-    /* Optional glowing pulse animation */
-    @keyframes glowPulse {
-        0% { background-position: 50% 100%; }
-        50% { background-position: 50% 90%; }
-        100% { background-position: 50% 100%; }
-    }
-
-    .stApp {
-        animation: glowPulse 10s ease-in-out infinite;
-    }
-    </style>
-    """,
-    unsafe_allow_html=True
-)
 
 
+with profiler.section("css/background"):
+    st.markdown(
+        """
+        <style>
+        .stApp {
+            /* Deep ocean gradient */
+            background: radial-gradient(
+                circle at center bottom,
+                rgba(124, 249, 214, 0.6) 0%,
+                rgba(111, 238, 183, 0.3) 20%,
+                rgba(127, 204, 182, 0.15) 40%,
+                rgba(0, 40, 60, 0.9) 80%,
+                rgba(0, 20, 30, 1) 100%
+            ),
+            linear-gradient(to top, rgba(0, 40, 60, 0.9), rgba(0, 0, 0, 0.95));
+            
+            background-size: cover;
+            background-attachment: fixed;
+            color: #ffffff;
+        }
 
+        /* Optional glowing pulse animation */
+        @keyframes glowPulse {
+            0% { background-position: 50% 100%; }
+            50% { background-position: 50% 90%; }
+            100% { background-position: 50% 100%; }
+        }
 
+        .stApp {
+            animation: glowPulse 10s ease-in-out infinite;
+        }
+        </style>
+        """,
+        unsafe_allow_html=True
+    )
 
 
 
 
-with table_dashboard:
+
+
+
+
+# ================== DASHBOARD CARDS ==================
+# Each card is a fragment: an interaction inside one only reruns that card.
+# Filter values are passed in, and everything expensive behind them is cached.
+
+@st.fragment
+@profiler.timed("dashboard/top_bar")
+def render_top_bar():
+    top_l, top_r = st.columns([7, 3], gap="medium")
+    with top_l:
+        st.markdown("<div class='section'>Dashboard</div>", unsafe_allow_html=True)
+
+    with top_r:
+        t1, t2 = st.columns([4,1])
+        with t1:
+            q = st.text_input("Search", placeholder="Search ARGO floats, regions, profiles…")
+        with t2:
+            st.write("") ; st.write("")
+            st.write("🙂")  # avatar placeholder
+
+
+@st.fragment
+@profiler.timed("dashboard/overview")
+def render_overview_card(view_key, param, depth):
+    # Overview data (Total Profiles + monthly means), memoized across sessions on the
+    # normalized filters and the data version
+    with profiler.section("dashboard/overview/data"):
+        overview = dashboard_data.overview(view_key, dashboard_data.data_version())
+    total_profiles = overview["total_profiles"]
+
+    st.markdown("<div class='card grad-purple'>", unsafe_allow_html=True)
+    st.markdown("### Overview")
+    st.markdown("<span class='pill-ghost'>Monthly</span>", unsafe_allow_html=True)
+
+    if overview["monthly"] is not None:
+        # monthly means from the precomputed rollups
+        df = overview["monthly"]
+    else:
+        # Fake data demo until the rollups have been built by ingestion
+        months = ["Jan","Feb","Mar","Apr","May","Jun","Jul","Aug","Sep","Oct","Nov","Dec"]
+        y = np.round(np.linspace(7.5, 9.5, 12) + np.random.randn(12)*0.15, 3)  # e.g., mean salinity/temperature index
+        df = pd.DataFrame({"month": months, "value": y})
+        df.set_index("month", inplace=True)
+
+    # LTTB keeps long series under the point budget
+    with profiler.section("dashboard/overview/chart"):
+        st.line_chart(downsample.downsample_series(df), height=220, use_container_width=True)
+
+    cK1, cK2, cK3 = st.columns(3)
+    with cK1:
+        st.markdown("<div class='kpi'>Total Profiles</div>", unsafe_allow_html=True)
+        st.markdown(f"<div class='kpi-value'>{total_profiles:,}</div>", unsafe_allow_html=True)
+        st.markdown("<div class='small'>April</div>", unsafe_allow_html=True)
+    with cK2:
+        st.markdown(f"<div class='kpi'>Parameter</div>", unsafe_allow_html=True)
+        # every selected parameter (the multiselect may also be empty)
+        st.markdown(f"<div class='kpi-value'>{', '.join(param) or '—'}</div>", unsafe_allow_html=True)
+        st.markdown("<div class='small'>Current filter</div>", unsafe_allow_html=True)
+    with cK3:
+        st.markdown("<div class='kpi'>Depth Window</div>", unsafe_allow_html=True)
+        st.markdown(f"<div class='kpi-value'>{depth[0]}–{depth[1]} m</div>", unsafe_allow_html=True)
+        st.markdown("<div class='small'>Selected</div>", unsafe_allow_html=True)
+
+    st.markdown("</div>", unsafe_allow_html=True)
+
+
+@st.cache_resource(max_entries=dashboard_data.CACHE_ENTRIES, show_spinner=False)
+def depth_profile_figure(view_key, version):
+    """
+    Shared-pressure-axis figure of the mean profile of every selected parameter, built
+    from the selection's one grid (a single fetch of all parameter columns) and cached
+    per filter state and data version. None when there is nothing to plot.
+    Shared between sessions: callers must not modify it.
+    """
+    date_range, param, depth, region, lat_range, lon_range = view_key
+    grid = dashboard_data.profile_grid_for(dashboard_data.grid_key(view_key), version)
+    columns = profile_store.param_columns(param)
+    if grid is None or not len(grid) or not columns:
+        return None
+    names = {profile_store.PARAM_COLUMNS[p]: p for p in param}
+    means = grid.mean_profiles(columns, depth).rename(columns=names)
+    long = means.reset_index().melt(id_vars="pressure", var_name="parameter", value_name="value")
+    # one panel per parameter: pressure is shared, each keeps its own value axis (units differ)
+    fig = px.line(long, x="value", y="pressure", facet_col="parameter", color="parameter",
+                  labels={"pressure": "Pressure (dbar)", "value": ""}, height=260)
+    fig.update_xaxes(matches=None, showticklabels=True)
+    fig.update_yaxes(autorange="reversed")
+    fig.for_each_annotation(lambda a: a.update(text=a.text.split("=")[-1]))
+    fig.update_layout(showlegend=False, margin=dict(l=0, r=0, t=24, b=0))
+    return fig
+
+
+@st.fragment
+@profiler.timed("dashboard/depth_profile")
+def render_depth_profile(view_key):
+    st.markdown("<div class='section'>Depth profile</div>", unsafe_allow_html=True)
+    # the grid is interpolated once per selection and data version, and the figure is
+    # cached per filter state; moving the depth slider only slices the grid's level axis
+    version = dashboard_data.data_version()
+    with profiler.section("dashboard/depth_profile/data"):
+        fig = depth_profile_figure(view_key, version)
+    if fig is None:
+        st.markdown("<div class='small'>No profiles for this selection yet.</div>",
+                    unsafe_allow_html=True)
+        return
+    grid = dashboard_data.profile_grid_for(dashboard_data.grid_key(view_key), version)
+    if grid.truncated:
+        st.markdown(f"<div class='small'>Mean of the first {len(grid):,} profiles only (row limit "
+                    "reached); narrow the filters to include all.</div>", unsafe_allow_html=True)
+    with profiler.section("dashboard/depth_profile/chart"):
+        st.plotly_chart(fig, use_container_width=True)
+
+
+@st.fragment
+@profiler.timed("dashboard/daily_query")
+def render_daily_query_card():
+    st.markdown("<div class='card grad-violet card-tight'>", unsafe_allow_html=True)
+    st.markdown("#### Daily Query")
+    st.markdown("<div class='small'>Today’s executed data requests</div>", unsafe_allow_html=True)
+    st.metric("Queries", value="42", delta="+7 vs. yesterday")
+    st.markdown("<span class='pill-ghost'>SQL</span><span class='pill-ghost'>RAG</span>", unsafe_allow_html=True)
+    st.markdown("</div>", unsafe_allow_html=True)
+
+
+@st.fragment
+@profiler.timed("dashboard/workspace")
+def render_workspace_card():
+    st.markdown("<div class='card grad-pink card-tight'>", unsafe_allow_html=True)
+    st.markdown("#### My Workspace")
+    st.markdown("<div class='small'>Saved views & exports</div>", unsafe_allow_html=True)
+    st.metric("Exports", value="12", delta="+3")
+    st.markdown("<span class='pill-ghost'>Parquet</span><span class='pill-ghost'>NetCDF</span>", unsafe_allow_html=True)
+    st.markdown("</div>", unsafe_allow_html=True)
+
+
+@st.fragment
+@profiler.timed("dashboard/activity_tiles")
+def render_activity_tiles(lat_range, lon_range):
+    # tile figures come from the precomputed climatology grids (memory-mapped, so each
+    # aggregate reads only its months and cells); blank until `python climatology.py` ran
+    clim = climatology.load()
+    a1, a2, a3 = st.columns(3)
+    with a1:
+        st.markdown("<div class='card'>", unsafe_allow_html=True)
+        st.markdown("🚴 Salinity Near Equator (Mar 2023)")
+        if clim is not None:
+            _, eq_lat, _ = PLACES["equator"]
+            value = clim.mean("Salinity", ["2023-03"], lat_range=eq_lat)
+            st.markdown("<div class='small'>No data</div>" if np.isnan(value) else
+                        f"<div class='small'>{value:.2f} PSU mean</div>", unsafe_allow_html=True)
+        st.markdown("</div>", unsafe_allow_html=True)
+
+    with a2:
+        st.markdown("<div class='card'>", unsafe_allow_html=True)
+        st.markdown("🏃 Compare BGC (Arabian Sea, 6 mo)")
+        if clim is not None:
+            _, sea_lat, sea_lon = PLACES["arabian sea"]
+            months = clim.select_months(last=6)
+            for param, unit in (("Oxygen", "µmol/kg"), ("Chl-a", "mg/m³")):
+                value = clim.mean(param, months, lat_range=sea_lat, lon_range=sea_lon)
+                text = f"{param} —" if np.isnan(value) else f"{param} {value:.2f} {unit}"
+                st.markdown(f"<div class='small'>{text}</div>", unsafe_allow_html=True)
+        st.markdown("</div>", unsafe_allow_html=True)
+
+    with a3:
+        st.markdown("<div class='card'>", unsafe_allow_html=True)
+        st.markdown("💪 Nearest ARGO Floats (Point)") 
+        # nearest floats to the centre of the selected lat/lon window
+        center_lat, center_lon = sum(lat_range) / 2, sum(lon_range) / 2
+        near_ids, near_km = float_index.nearest(center_lat, center_lon, k=3)
+        for fid, km in zip(floats_df["float_id"].to_numpy()[near_ids], near_km):
+            st.markdown(f"<div class='small'>#{fid} · {km:,.0f} km</div>", unsafe_allow_html=True)
+        st.markdown("</div>", unsafe_allow_html=True)
+
+
+@st.fragment
+@profiler.timed("dashboard/live_map")
+def render_live_map(view_key):
+    date_range, param, depth, region, lat_range, lon_range = view_key
+    st.markdown("<div class='section'>Live map</div>", unsafe_allow_html=True)
+    # Mini map: floats inside the lat/lon filters, looked up through the grid index
+    map_df = floats_df.iloc[float_index.bbox(lat_range, lon_range)][["lat", "lon"]]
+    budget = downsample.MAP_POINT_BUDGET
+    layers = []
+
+    # overlay: climatology cells of the first selected parameter, blue (low) to red (high);
+    # floats and overlay share the point budget, the overlay taking what floats leave
+    clim = climatology.load()
+    if clim is not None and param:
+        with profiler.section("dashboard/live_map/overlay"):
+            cells = clim.mean_grid(param[0], clim.select_months(date_range),
+                                   lat_range=lat_range, lon_range=lon_range, depth=depth,
+                                   budget=budget - min(len(map_df), budget // 2))
+        if not cells.empty:
+            v = cells["value"].to_numpy()
+            t = (v - v.min()) / ((v.max() - v.min()) or 1)
+            cells = cells.assign(color=[f"#{int(255 * x):02x}40{int(255 * (1 - x)):02x}80" for x in t],
+                                 size=cells["deg"] * 111_000 / 2)
+            layers.append(cells[["lat", "lon", "color", "size"]])
+
+    # clustered to the rest of the budget; narrower lat/lon windows give finer clusters
+    budget -= sum(len(layer) for layer in layers)
+    floats = downsample.bin_points(map_df, lat_range, lon_range, budget=budget)
+    # marker area grows with the cluster's float count; frames within budget have no count
+    size = MAP_FLOAT_SIZE * np.sqrt(floats.get("count", 1))
+    layers.append(floats.assign(color=FLOAT_COLOR, size=size)[["lat", "lon", "color", "size"]])
+    map_df = pd.concat(layers, ignore_index=True)
+
+    with profiler.section("dashboard/live_map/chart"):
+        st.map(map_df, color="color", size="size", height=210)
+
+
+@st.fragment
+@profiler.timed("tab/dashboard")
+def render_dashboard():
     # ================== THEME & CSS ==================
     st.markdown("""
         <style>
@@ -582,22 +922,10 @@ with table_dashboard:
     """, unsafe_allow_html=True)
 
     # ================== TOP BAR ==================
-    top_l, top_r = st.columns([7, 3], gap="medium")
-    with top_l:
-        st.markdown("<div class='section'>Dashboard</div>", unsafe_allow_html=True)
-
-    with top_r:
-        t1, t2 = st.columns([4,1])
-        with t1:
-            q = st.text_input("Search", placeholder="Search ARGO floats, regions, profiles…")
-        with t2:
-            st.write("") ; st.write("")
-            st.write("🙂")  # avatar placeholder
+    render_top_bar()
 
     st.write("")
 
-        # ---------- Middle (Main) ----------
-
     # Filters (drive plots)
     fl1, fl2, fl3, fl4 = st.columns([2,2,2,2])
     with fl1:
@@ -621,140 +949,102 @@ with table_dashboard:
     # ------- Top row: Overview + two stacked cards -------
     top_big, top_s1, top_s2 = st.columns([2.3, 1.2, 1.2])
 
+    view_key = dashboard_data.filter_key(date_range, param, depth, region, lat_range, lon_range)
 
     # ================== MAIN 3-COLUMN GRID ==================
     rail_col, main_col, right_col = st.columns([1, 7, 3], gap="large")
-   
 
     # ---------- Middle (Main) ----------
     with main_col:
-       
 
         # ------- Top row: Overview + two stacked cards -------
         top_big, top_s1, top_s2 = st.columns([2.3, 1.2, 1.2])
 
         # Overview gradient card with line chart
         with top_big:
-            st.markdown("<div class='card grad-purple'>", unsafe_allow_html=True)
-            st.markdown("### Overview")
-            st.markdown("<span class='pill-ghost'>Monthly</span>", unsafe_allow_html=True)
-
-            # Fake data demo – replace with real ARGO aggregates
-            import pandas as pd, numpy as np
-            months = ["Jan","Feb","Mar","Apr","May","Jun","Jul","Aug","Sep","Oct","Nov","Dec"]
-            y = np.round(np.linspace(7.5, 9.5, 12) + np.random.randn(12)*0.15, 3)  # e.g., mean salinity/temperature index
-            df = pd.DataFrame({"month": months, "value": y})
-            df.set_index("month", inplace=True)
-
-            st.line_chart(df, height=220, use_container_width=True)
-
-            cK1, cK2, cK3 = st.columns(3)
-            with cK1:
-                st.markdown("<div class='kpi'>Total Profiles</div>", unsafe_allow_html=True)
-                st.markdown("<div class='kpi-value'>9,178</div>", unsafe_allow_html=True)
-                st.markdown("<div class='small'>April</div>", unsafe_allow_html=True)
-            with cK2:
-                st.markdown(f"<div class='kpi'>Parameter</div>", unsafe_allow_html=True)
-                st.markdown(f"<div class='kpi-value'>{param[0]}</div>", unsafe_allow_html=True)
-                st.markdown("<div class='small'>Current filter</div>", unsafe_allow_html=True)
-            with cK3:
-                st.markdown("<div class='kpi'>Depth Window</div>", unsafe_allow_html=True)
-                st.markdown(f"<div class='kpi-value'>{depth[0]}–{depth[1]} m</div>", unsafe_allow_html=True)
-                st.markdown("<div class='small'>Selected</div>", unsafe_allow_html=True)
-
-            st.markdown("</div>", unsafe_allow_html=True)
+            render_overview_card(view_key, param, depth)
 
         # Daily Query (violet)
         with top_s1:
-            st.markdown("<div class='card grad-violet card-tight'>", unsafe_allow_html=True)
-            st.markdown("#### Daily Query")
-            st.markdown("<div class='small'>Today’s executed data requests</div>", unsafe_allow_html=True)
-            st.metric("Queries", value="42", delta="+7 vs. yesterday")
-            st.markdown("<span class='pill-ghost'>SQL</span><span class='pill-ghost'>RAG</span>", unsafe_allow_html=True)
-            st.markdown("</div>", unsafe_allow_html=True)
+            render_daily_query_card()
 
         # My Workspace (pink)
         with top_s2:
-            st.markdown("<div class='card grad-pink card-tight'>", unsafe_allow_html=True)
-            st.markdown("#### My Workspace")
-            st.markdown("<div class='small'>Saved views & exports</div>", unsafe_allow_html=True)
-            st.metric("Exports", value="12", delta="+3")
-            st.markdown("<span class='pill-ghost'>Parquet</span><span class='pill-ghost'>NetCDF</span>", unsafe_allow_html=True)
-            st.markdown("</div>", unsafe_allow_html=True)
+            render_workspace_card()
 
         st.write("")
 
         # ------- Activity Tiles (3 cards) -------
-        a1, a2, a3 = st.columns(3)
-        with a1:
-            st.markdown("<div class='card'>", unsafe_allow_html=True)
-            st.markdown("🚴 Salinity Near Equator (Mar 2023)")
-            st.markdown("</div>", unsafe_allow_html=True)
-
-        with a2:
-            st.markdown("<div class='card'>", unsafe_allow_html=True)
-            st.markdown("🏃 Compare BGC (Arabian Sea, 6 mo)")
-            st.markdown("</div>", unsafe_allow_html=True)
-
-        with a3:
-            st.markdown("<div class='card'>", unsafe_allow_html=True)
-            st.markdown("💪 Nearest ARGO Floats (Point)") 
-            st.markdown("</div>", unsafe_allow_html=True)
+        render_activity_tiles(lat_range, lon_range)
 
         st.write("")
 
+        render_depth_profile(view_key)
+
+        st.write("")
 
     # ---------- Right Panel ----------
     with right_col:
+        render_live_map(view_key)
 
-        st.markdown("<div class='section'>Live map</div>", unsafe_allow_html=True)
-        # Mini map (Indian Ocean center-ish)
-        import pandas as pd
-        map_df = pd.DataFrame({"lat":[-5,10,-15,5], "lon":[70,80,60,90]})
-        st.map(map_df, height=210)
 
+with table_dashboard:
+    render_dashboard()
 
 
-st.markdown(
-    """
-    <style>
-    /* Input boxes, text areas, and select boxes */
-    .stTextInput > div > div > input,
-    .stTextArea > div > textarea,
-    .stSelectbox > div > div,
-    .stNumberInput > div > div > input {
-        background-color: rgba(20, 40, 50, 0.9); /* dark grid color */
-        color: #e0fdfb;  /* neon aqua text */
-        border: 1px solid rgba(124, 249, 214, 0.4);
-        border-radius: 10px;
-        padding: 8px;
-    }
-
-    /* Change focus glow */
-    .stTextInput > div > div > input:focus,
-    .stTextArea > div > textarea:focus,
-    .stSelectbox > div > div:focus,
-    .stNumberInput > div > div > input:focus {
-        border: 1px solid #7cf9d6;
-        box-shadow: 0 0 12px #7cf9d6;
-        outline: none;
-    }
-
-    /* Buttons */
-    .stButton > button {
-        background-color: rgba(30, 60, 70, 0.95);
-        color: #7cf9d6;
-        border: 1px solid #7cf9d6;
-        border-radius: 12px;
-        padding: 8px 16px;
-        transition: 0.3s;
-    }
-    .stButton > button:hover {
-        background-color: #7cf9d6;
-        color: #0a1a1f;
-        box-shadow: 0 0 15px #7cf9d6;
-    }
-    </style>
-    """,
-    unsafe_allow_html=True
-)
\ No newline at end of file
+with profiler.section("css/inputs"):
+    st.markdown(
+        """
+        <style>
+        /* Input boxes, text areas, and select boxes */
+        .stTextInput > div > div > input,
+        .stTextArea > div > textarea,
+        .stSelectbox > div > div,
+        .stNumberInput > div > div > input {
+            background-color: rgba(20, 40, 50, 0.9); /* dark grid color */
+            color: #e0fdfb;  /* neon aqua text */
+            border: 1px solid rgba(124, 249, 214, 0.4);
+            border-radius: 10px;
+            padding: 8px;
+        }
+
+        /* Change focus glow */
+        .stTextInput > div > div > input:focus,
+        .stTextArea > div > textarea:focus,
+        .stSelectbox > div > div:focus,
+        .stNumberInput > div > div > input:focus {
+            border: 1px solid #7cf9d6;
+            box-shadow: 0 0 12px #7cf9d6;
+            outline: none;
+        }
+
+        /* Buttons */
+        .stButton > button {
+            background-color: rgba(30, 60, 70, 0.95);
+            color: #7cf9d6;
+            border: 1px solid #7cf9d6;
+            border-radius: 12px;
+            padding: 8px 16px;
+            transition: 0.3s;
+        }
+        .stButton > button:hover {
+            background-color: #7cf9d6;
+            color: #0a1a1f;
+            box-shadow: 0 0 15px #7cf9d6;
+        }
+        </style>
+        """,
+        unsafe_allow_html=True
+    )
+
+profiler.record("rerun/total", (time.perf_counter() - _rerun_start) * 1000)
+
+# Hidden admin panel: open the app with ?admin=1
+if st.query_params.get("admin") == "1":
+    with st.expander("⏱ Render timings (rolling p50 / p95)"):
+        timings = profiler.stats()
+        st.dataframe(pd.DataFrame(timings), use_container_width=True)
+        st.download_button("Export JSON lines", "\n".join(json.dumps(r) for r in timings),
+                           file_name="render_timings.jsonl")
+    with st.expander("🔎 Query embedding cache"):
+        st.dataframe(pd.DataFrame([query_cache.stats()]), use_container_width=True, hide_index=True)
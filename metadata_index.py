@@ -0,0 +1,91 @@
+import numpy as np
+import pandas as pd
+
+# dashboard filter name -> catalog column it ranges over
+RANGE_COLUMNS = {
+    "lat_range": "latitude",
+    "lon_range": "longitude",
+    "date_range": "time",
+    "depth": "pressure",
+}
+
+
+class MetadataIndex:
+    """
+    Sorted-column and group indexes over the catalog's metadata, built once.
+    A range filter is two binary searches instead of a boolean mask over every row,
+    so pandas_query only has to score the rows that survive the filters.
+    """
+
+    def __init__(self, frame):
+        self.n_rows = len(frame)
+        self._sorted = {}
+        for col in RANGE_COLUMNS.values():
+            if col not in frame.columns:
+                continue
+            values = frame[col]
+            values = pd.to_datetime(values).to_numpy() if col == "time" else values.to_numpy(dtype=np.float64)
+            order = np.argsort(values, kind="stable")
+            self._sorted[col] = (values[order], order.astype(np.intp))
+        self._groups = {}
+        if "region" in frame.columns:
+            for name, rows in frame.groupby("region", sort=False).indices.items():
+                self._groups[name] = np.sort(rows).astype(np.intp)
+
+    def _range(self, col, lo, hi):
+        values, order = self._sorted[col]
+        start = np.searchsorted(values, lo, side="left") if lo is not None else 0
+        stop = np.searchsorted(values, hi, side="right") if hi is not None else len(values)
+        return np.sort(order[start:stop])
+
+    @staticmethod
+    def _bounds(key, value):
+        if key == "date_range":
+            # st.date_input gives [], [start] or [start, end]
+            value = list(value or [])
+            if not value:
+                return None
+            lo = np.datetime64(pd.Timestamp(value[0]))
+            if len(value) == 1:
+                return lo, None  # only a start date picked so far: open-ended
+            # the end date is inclusive, up to its last nanosecond
+            hi = np.datetime64(pd.Timestamp(value[-1]) + pd.Timedelta(days=1) - pd.Timedelta(1, "ns"))
+            return lo, hi
+        lo, hi = value
+        return lo, hi
+
+    def select(self, **filters):
+        """
+        Sorted row positions matching every given filter, or None if no filter applies.
+        Accepts lat_range, lon_range, date_range, depth (pressure range) and region,
+        named like the dashboard widgets. A lon_range with lo > hi wraps the antimeridian.
+        """
+        sets = []
+        for key, value in filters.items():
+            if value is None:
+                continue
+            if key == "region":
+                sets.append(self._groups.get(value, np.empty(0, dtype=np.intp)))
+                continue
+            if key not in RANGE_COLUMNS:
+                raise ValueError(f"unknown filter: {key}")
+            col = RANGE_COLUMNS[key]
+            bounds = self._bounds(key, value)
+            if bounds is None or col not in self._sorted:
+                continue
+            lo, hi = bounds
+            if key == "lon_range" and lo > hi:
+                sets.append(np.union1d(self._range(col, lo, None), self._range(col, None, hi)))
+            else:
+                sets.append(self._range(col, lo, hi))
+
+        if not sets:
+            return None
+        # intersect smallest first so every step works on as few rows as possible
+        sets.sort(key=len)
+        rows = sets[0]
+        for other in sets[1:]:
+            if not len(rows):
+                break
+            rows = np.intersect1d(rows, other, assume_unique=True)
+        return rows
@@ -0,0 +1,161 @@
+import glob
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from functools import partial
+
+import netCDF4
+import numpy as np
+import pandas as pd
+
+import profile_store
+import rollups
+import sql_store
+
+# rows per chunk handed to the profile store
+CHUNK_ROWS = 100_000
+
+# profile store column -> ARGO NetCDF variable (the _ADJUSTED version is preferred)
+VARIABLES = {
+    "pressure": "PRES",
+    "temperature": "TEMP",
+    "salinity": "PSAL",
+    "oxygen": "DOXY",
+    "chla": "CHLA",
+}
+
+ARGO_EPOCH = pd.Timestamp("1950-01-01")
+
+
+def _filled(var, sl=slice(None)):
+    """Reads var[sl] (only that slice comes off disk) as float with fill values turned into NaN."""
+    return np.ma.filled(np.ma.asarray(var[sl], dtype=np.float64), np.nan)
+
+
+def _levels(nc, name, p0, p1):
+    # delayed-mode (adjusted) values when the file has any for these profiles
+    for var in (name + "_ADJUSTED", name):
+        if var in nc.variables:
+            data = _filled(nc.variables[var], slice(p0, p1)).astype(np.float32)
+            if var == name or not np.isnan(data).all():
+                return data
+    return None
+
+
+def iter_chunks(path: str, chunk_rows: int = CHUNK_ROWS):
+    """
+    Yields DataFrames of up to ~chunk_rows measurement rows from one ARGO profile file:
+    float_id, cycle, time, latitude, longitude, region, pressure, temperature,
+    salinity, oxygen, chla. Only the profiles of the current chunk are read from disk.
+    """
+    with netCDF4.Dataset(path) as nc:
+        nc.set_auto_mask(True)
+        n_prof = len(nc.dimensions["N_PROF"])
+        n_levels = len(nc.dimensions["N_LEVELS"])
+        if n_prof == 0 or n_levels == 0:
+            return
+
+        # per-profile metadata is tiny (one value per profile), read it once
+        platforms = netCDF4.chartostring(nc.variables["PLATFORM_NUMBER"][:])
+        float_ids = np.array([int(str(p).strip() or -1) for p in np.atleast_1d(platforms)], dtype=np.int64)
+        cycles = np.ma.filled(nc.variables["CYCLE_NUMBER"][:], -1).astype(np.int32)
+        times = (ARGO_EPOCH + pd.to_timedelta(_filled(nc.variables["JULD"]), unit="D")).to_numpy()
+        lats = _filled(nc.variables["LATITUDE"])
+        lons = _filled(nc.variables["LONGITUDE"])
+
+        step = max(1, chunk_rows // n_levels)
+        for p0 in range(0, n_prof, step):
+            p1 = min(p0 + step, n_prof)
+            levels = {col: _levels(nc, var, p0, p1) for col, var in VARIABLES.items()}
+            pres = levels["pressure"]
+            if pres is None:
+                continue
+            valid = ~np.isnan(pres)
+            prof, _ = np.nonzero(valid)
+            if not len(prof):
+                continue
+            prof += p0
+
+            chunk = pd.DataFrame({
+                "float_id": float_ids[prof],
+                "cycle": cycles[prof],
+                "time": times[prof],
+                "latitude": lats[prof],
+                "longitude": lons[prof],
+            })
+            for col, data in levels.items():
+                chunk[col] = data[valid] if data is not None else np.float32(np.nan)
+            chunk["region"] = profile_store.region_of(chunk["latitude"], chunk["longitude"])
+            yield chunk
+
+
+def ingest_file(path: str, root: str = profile_store.PROFILE_DIR, chunk_rows: int = CHUNK_ROWS):
+    """
+    Streams one NetCDF file into the profile store.
+    Returns (rows written, rollup partial for the file, or None if it had no rows).
+    """
+    rows = 0
+    partials = []
+    for chunk in iter_chunks(path, chunk_rows):
+        profile_store.write_profiles(chunk, root, source=path)
+        partials.append(rollups.rollup_chunk(chunk))
+        rows += len(chunk)
+    return rows, (rollups.merge(partials) if partials else None)
+
+
+def ingest_directory(src_dir: str, root: str = profile_store.PROFILE_DIR, workers: int = None,
+                     chunk_rows: int = CHUNK_ROWS, db_path: str = sql_store.DB_PATH,
+                     rollup_dir: str = rollups.ROLLUP_DIR):
+    """
+    Ingests every *.nc file under src_dir, one file per worker process at a time.
+    Each worker writes its own Parquet files, so no coordination is needed; their
+    rollup partials are folded into the rollups at rollup_dir once at the end, and the
+    embedded database at db_path (if one has been built) is rebuilt from root.
+
+    Re-runs are idempotent: files whose path and mtime are in the store's ingest
+    ledger are skipped, and a file updated in place has its earlier rows (and their
+    share of the rollups) removed before it is ingested again.
+    """
+    paths = sorted(glob.glob(os.path.join(src_dir, "**", "*.nc"), recursive=True))
+    ledger = profile_store.ingested(root)
+    mtimes = {os.path.abspath(p): os.stat(p).st_mtime_ns for p in paths}
+    todo = [p for p in paths if ledger.get(os.path.abspath(p)) != mtimes[os.path.abspath(p)]]
+
+    removed = []
+    for p in todo:
+        if ledger.pop(os.path.abspath(p), None) is not None:
+            old = profile_store.read_source(p, root)
+            if len(old):
+                removed.append(rollups.rollup_chunk(old))
+        # also clears rows left behind by an earlier run that failed on this file
+        profile_store.delete_source(p, root)
+
+    total = 0
+    partials = []
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        futures = {pool.submit(partial(ingest_file, root=root, chunk_rows=chunk_rows), p): p for p in todo}
+        for i, fut in enumerate(as_completed(futures), 1):
+            path = futures[fut]
+            try:
+                rows, part = fut.result()
+                total += rows
+                if part is not None:
+                    partials.append(part)
+                ledger[os.path.abspath(path)] = mtimes[os.path.abspath(path)]
+            except Exception as e:  # one broken file shouldn't stop the whole run
+                profile_store.delete_source(path, root)
+                print(f"\nskipped {path}: {e}")
+            print(f"\rIngested {i}/{len(todo)} files ({len(paths) - len(todo)} unchanged), {total:,} rows",
+                  end="", flush=True)
+    print()
+    profile_store.record_ingested(ledger, root)
+    rollups.update(partials, rollup_dir, removed=removed)
+    if (total or removed) and sql_store.exists(db_path):
+        # keep the embedded database in step; until then readers fall back to Parquet
+        sql_store.rebuild(root, db_path)
+    return total
+
+
+if __name__ == "__main__":
+    # python netcdf_ingest.py <dir with ARGO *.nc files> [profile store dir]
+    ingest_directory(sys.argv[1], *sys.argv[2:3])
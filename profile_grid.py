@@ -0,0 +1,108 @@
+import warnings
+
+import numpy as np
+import pandas as pd
+
+# standard pressure levels (dbar), matching the dashboard's 0–2000 m / step 50 slider
+LEVELS = np.arange(0, 2001, 50, dtype=np.float32)
+
+
+def interpolate(profile, pressure, values, levels=LEVELS):
+    """
+    Linear interpolation of many profiles at once onto `levels`.
+    profile:  int profile number per measurement, 0..n-1 (any order)
+    pressure, values: same length as profile
+    Returns float32 (n, len(levels)); NaN where a level lies outside the profile's
+    measured range (no extrapolation) or the profile has no valid values.
+    """
+    profile = np.asarray(profile, dtype=np.int64)
+    pressure = np.asarray(pressure, dtype=np.float64)
+    values = np.asarray(values, dtype=np.float64)
+    levels = np.asarray(levels, dtype=np.float64)
+    n = int(profile.max()) + 1 if len(profile) else 0
+    out = np.full((n, len(levels)), np.nan, dtype=np.float32)
+
+    ok = ~(np.isnan(pressure) | np.isnan(values))
+    profile, pressure, values = profile[ok], pressure[ok], values[ok]
+    if not len(profile):
+        return out
+
+    # one sorted key per measurement, profile-major: a single searchsorted then finds
+    # the bracketing measurements of every (profile, level) pair
+    base = min(pressure.min(), levels[0])
+    stride = max(pressure.max(), levels[-1]) - base + 1
+    keys = profile * stride + (pressure - base)
+    order = np.argsort(keys, kind="stable")
+    keys, profile, values = keys[order], profile[order], values[order]
+
+    row = np.repeat(np.arange(n), len(levels))
+    targets = row * stride + np.tile(levels - base, n)
+    right = np.searchsorted(keys, targets, side="left")
+    r = np.minimum(right, len(keys) - 1)
+    l = np.maximum(right - 1, 0)
+
+    exact = (right < len(keys)) & (keys[r] == targets) & (profile[r] == row)
+    inside = (right > 0) & (right < len(keys)) & (profile[l] == row) & (profile[r] == row)
+    span = keys[r] - keys[l]
+    w = np.divide(targets - keys[l], span, out=np.zeros_like(span), where=span > 0)
+    result = values[l] + w * (values[r] - values[l])
+    result = np.where(exact, values[r], result)
+    result[~(inside | exact)] = np.nan
+    out[:] = result.reshape(n, len(levels))
+    return out
+
+
+class ProfileGrid:
+    """
+    Every profile of a selection resampled onto standard pressure levels.
+    profiles: one row per (float_id, cycle) with its time and position
+    values:   {parameter column: float32 array of shape (profiles, levels)}
+    truncated: the selection had more rows than were read, so only some profiles are here
+    Depth windows are slices along the level axis, so they need no new interpolation.
+    """
+
+    __slots__ = ("profiles", "levels", "values", "truncated")
+
+    def __init__(self, profiles: pd.DataFrame, levels: np.ndarray, values: dict, truncated: bool = False):
+        self.profiles = profiles
+        self.levels = levels
+        self.values = values
+        self.truncated = truncated
+
+    def __len__(self):
+        return len(self.profiles)
+
+    def window(self, depth=None) -> slice:
+        """Level slice for a (min, max) pressure window; all levels when depth is None."""
+        if not depth:
+            return slice(None)
+        lo, hi = np.searchsorted(self.levels, [depth[0], depth[1]], side="left")
+        if hi < len(self.levels) and self.levels[hi] == depth[1]:
+            hi += 1
+        return slice(int(lo), int(hi))
+
+    def mean_profiles(self, columns=None, depth=None) -> pd.DataFrame:
+        """Mean over profiles per level: one column per parameter, indexed by pressure."""
+        s = self.window(depth)
+        columns = columns or list(self.values)
+        with warnings.catch_warnings():
+            # nanmean warns on all-NaN levels; those simply come out as NaN
+            warnings.simplefilter("ignore", RuntimeWarning)
+            means = {c: np.nanmean(self.values[c][:, s], axis=0) if len(self) else
+                     np.full(len(self.levels[s]), np.nan) for c in columns}
+        return pd.DataFrame(means, index=pd.Index(self.levels[s], name="pressure"))
+
+
+def build(rows: pd.DataFrame, columns, levels=LEVELS, truncated: bool = False) -> ProfileGrid:
+    """
+    Grid from long-format measurements (float_id, cycle, pressure, the parameter
+    columns, optionally time/latitude/longitude), one profile per (float_id, cycle).
+    """
+    # profiles are numbered in order of first appearance, matching drop_duplicates below
+    codes = rows.groupby(["float_id", "cycle"], sort=False).ngroup().to_numpy()
+    meta = [c for c in ("time", "latitude", "longitude") if c in rows.columns]
+    profiles = rows[["float_id", "cycle"] + meta].drop_duplicates(["float_id", "cycle"]).reset_index(drop=True)
+    pressure = rows["pressure"].to_numpy(dtype=np.float64)
+    values = {c: interpolate(codes, pressure, rows[c].to_numpy(dtype=np.float64), levels)
+              for c in columns}
+    return ProfileGrid(profiles, np.asarray(levels, dtype=np.float32), values, truncated)
@@ -0,0 +1,207 @@
+import glob
+import hashlib
+import json
+import os
+import uuid
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+
+from atomic_files import save_json
+
+PROFILE_DIR = os.environ.get("PROFILE_DIR", os.path.join("data", "profiles"))
+
+# directory layout: <PROFILE_DIR>/region=.../month=YYYY-MM/float_id=.../*.parquet
+PARTITION_COLUMNS = ["region", "month", "float_id"]
+
+SCHEMA = pa.schema([
+    ("float_id", pa.int64()),
+    ("cycle", pa.int32()),
+    ("time", pa.timestamp("ns")),
+    ("latitude", pa.float64()),
+    ("longitude", pa.float64()),
+    ("pressure", pa.float32()),
+    ("temperature", pa.float32()),
+    ("salinity", pa.float32()),
+    ("oxygen", pa.float32()),
+    ("chla", pa.float32()),
+    ("region", pa.string()),
+    ("month", pa.string()),
+])
+
+# dashboard "Parameter" choices -> measurement columns
+PARAM_COLUMNS = {
+    "Temperature": "temperature",
+    "Salinity": "salinity",
+    "Oxygen": "oxygen",
+    "Chl-a": "chla",
+}
+
+# bumped after every write; the leading "_" keeps dataset discovery from reading it
+VERSION_FILE = "_VERSION"
+
+# source file path -> mtime_ns of every NetCDF file ingested so far (see netcdf_ingest)
+INGESTED_FILE = "_INGESTED.json"
+
+# keep row groups small enough that min/max statistics can skip most of them
+ROW_GROUP_SIZE = 64_000
+
+_PARTITIONING = ds.partitioning(
+    pa.schema([(c, SCHEMA.field(c).type) for c in PARTITION_COLUMNS]), flavor="hive"
+)
+
+
+def region_of(lat, lon):
+    """Coarse ocean basin of each position, matching the dashboard's Region choices."""
+    lat = np.asarray(lat, dtype=np.float64)
+    lon = (np.asarray(lon, dtype=np.float64) + 180.0) % 360.0 - 180.0
+    indian = (lat < 30) & (((lon >= 20) & (lon < 120)) | ((lon >= 120) & (lon < 147) & (lat < -10)))
+    atlantic = ((lon >= -70) & (lon < 20)) | ((lon >= -100) & (lon < -70) & (lat > 10))
+    return np.where(indian, "Indian Ocean", np.where(atlantic, "Atlantic Ocean", "Pacific Ocean"))
+
+
+def exists(root: str = PROFILE_DIR):
+    return os.path.isdir(root) and any(os.scandir(root))
+
+
+def source_tag(path: str) -> str:
+    """Short stable id of a source file, embedded in the names of the Parquet files it produced."""
+    return hashlib.sha1(os.path.abspath(path).encode("utf-8")).hexdigest()[:16]
+
+
+def write_profiles(frame, root: str = PROFILE_DIR, source: str = None):
+    """
+    Appends measurement rows (one per float/cycle/pressure level) to the store.
+    Rows are sorted by float, time and pressure first, so row-group statistics stay tight.
+    source: the file the rows came from; its rows can later be found with source_files().
+    """
+    frame = frame.copy()
+    for col in SCHEMA.names:
+        if col not in frame.columns:
+            frame[col] = None  # e.g. core floats carry no oxygen/chl-a
+    frame["time"] = pd.to_datetime(frame["time"])
+    frame["month"] = frame["time"].dt.strftime("%Y-%m")
+    frame = frame.sort_values(["float_id", "time", "pressure"])
+    table = pa.Table.from_pandas(frame, schema=SCHEMA, preserve_index=False)
+    ds.write_dataset(
+        table, root, format="parquet", partitioning=_PARTITIONING,
+        basename_template=f"part-{source_tag(source) if source else 'x'}-{uuid.uuid4().hex}-{{i}}.parquet",
+        existing_data_behavior="overwrite_or_ignore",
+        min_rows_per_group=ROW_GROUP_SIZE // 4, max_rows_per_group=ROW_GROUP_SIZE,
+    )
+    _bump_version(root)
+
+
+def _bump_version(root):
+    with open(os.path.join(root, VERSION_FILE), "w") as f:
+        f.write(uuid.uuid4().hex)
+
+
+def source_files(source: str, root: str = PROFILE_DIR):
+    """Parquet files written from `source` (see write_profiles)."""
+    return glob.glob(os.path.join(root, "**", f"part-{source_tag(source)}-*.parquet"), recursive=True)
+
+
+def read_source(source: str, root: str = PROFILE_DIR):
+    """Every stored row that came from `source`, partition columns included."""
+    paths = source_files(source, root)
+    if not paths:
+        return pd.DataFrame(columns=SCHEMA.names)
+    data = ds.dataset(paths, format="parquet", schema=SCHEMA, partitioning=_PARTITIONING,
+                      partition_base_dir=root)
+    return data.to_table().to_pandas()
+
+
+def delete_source(source: str, root: str = PROFILE_DIR):
+    """Removes the rows that came from `source`, e.g. before re-ingesting an updated file."""
+    paths = source_files(source, root)
+    for p in paths:
+        os.remove(p)
+    if paths:
+        _bump_version(root)
+
+
+def ingested(root: str = PROFILE_DIR):
+    """{source path: mtime_ns} of the files already ingested into the store."""
+    try:
+        with open(os.path.join(root, INGESTED_FILE)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def record_ingested(files, root: str = PROFILE_DIR):
+    """Replaces the ingest ledger with `files` ({source path: mtime_ns})."""
+    os.makedirs(root, exist_ok=True)
+    save_json(os.path.join(root, INGESTED_FILE), files)
+
+
+def version(root: str = PROFILE_DIR):
+    """Changes whenever data is written; 0 if the store is empty. One stat() call."""
+    try:
+        return os.stat(os.path.join(root, VERSION_FILE)).st_mtime_ns
+    except OSError:
+        return 0
+
+
+def dataset(root: str = PROFILE_DIR):
+    """Lazy handle on the store; nothing is read until a scan asks for it."""
+    return ds.dataset(root, format="parquet", schema=SCHEMA, partitioning=_PARTITIONING)
+
+
+def build_filter(date_range=None, depth=None, region=None, lat_range=None, lon_range=None, float_ids=None):
+    """
+    Turns dashboard filter values into a pyarrow expression. Region, month and float_id
+    are partition keys, so those terms skip whole directories; the rest are checked
+    against row-group min/max statistics before any data pages are read.
+    """
+    terms = []
+    if region:
+        terms.append(pc.field("region") == region)
+    date_range = list(date_range or [])
+    if date_range:
+        start = pd.Timestamp(date_range[0])
+        terms.append(pc.field("month") >= start.strftime("%Y-%m"))
+        terms.append(pc.field("time") >= pa.scalar(start, pa.timestamp("ns")))
+        if len(date_range) > 1:
+            end = pd.Timestamp(date_range[-1]) + pd.Timedelta(days=1)
+            terms.append(pc.field("month") <= pd.Timestamp(date_range[-1]).strftime("%Y-%m"))
+            terms.append(pc.field("time") < pa.scalar(end, pa.timestamp("ns")))
+    if depth:
+        terms.append((pc.field("pressure") >= depth[0]) & (pc.field("pressure") <= depth[1]))
+    if lat_range:
+        terms.append((pc.field("latitude") >= lat_range[0]) & (pc.field("latitude") <= lat_range[1]))
+    if lon_range:
+        lo, hi = lon_range
+        if lo <= hi:
+            terms.append((pc.field("longitude") >= lo) & (pc.field("longitude") <= hi))
+        else:
+            terms.append((pc.field("longitude") >= lo) | (pc.field("longitude") <= hi))
+    if float_ids is not None:
+        terms.append(pc.field("float_id").isin(list(float_ids)))
+
+    expr = None
+    for t in terms:
+        expr = t if expr is None else expr & t
+    return expr
+
+
+def read_profiles(columns=None, root: str = PROFILE_DIR, limit: int = None, **filters):
+    """
+    Reads only the `columns` and the partitions/row groups matching `filters`
+    (see build_filter) and returns them as a DataFrame. With `limit`, the scan
+    stops after that many matching rows.
+    """
+    data = dataset(root)
+    expr = build_filter(**filters)
+    if limit is not None:
+        return data.head(limit, columns=columns, filter=expr).to_pandas()
+    return data.to_table(columns=columns, filter=expr).to_pandas()
+
+
+def param_columns(params):
+    """Measurement column names for the dashboard's selected parameters."""
+    return [PARAM_COLUMNS[p] for p in params if p in PARAM_COLUMNS]
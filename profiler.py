@@ -0,0 +1,65 @@
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import numpy as np
+
+# timings kept per section for the rolling percentiles
+WINDOW = 500
+
+# set PROFILE_LOG=path/to/file.jsonl to also append every timing as a JSON line
+PROFILE_LOG = os.environ.get("PROFILE_LOG")
+
+# shared by all sessions in this process
+_timings = {}
+_lock = threading.Lock()
+
+
+def record(name: str, ms: float):
+    with _lock:
+        _timings.setdefault(name, deque(maxlen=WINDOW)).append(ms)
+        if PROFILE_LOG:
+            with open(PROFILE_LOG, "a") as f:
+                f.write(json.dumps({"ts": time.time(), "section": name, "ms": round(ms, 3)}) + "\n")
+
+
+@contextmanager
+def section(name: str):
+    """Times the enclosed block under `name` (e.g. "dashboard/overview")."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name, (time.perf_counter() - start) * 1000)
+
+
+def timed(name: str):
+    """Decorator version of section(), for the render_* functions."""
+    def wrap(fn):
+        @functools.wraps(fn)
+        def inner(*args, **kwargs):
+            with section(name):
+                return fn(*args, **kwargs)
+        return inner
+    return wrap
+
+
+def stats():
+    """One row per section: calls in the window, last, p50, p95 and max (ms), slowest p95 first."""
+    with _lock:
+        snapshot = {name: np.array(t) for name, t in _timings.items()}
+    rows = []
+    for name, t in snapshot.items():
+        p50, p95 = np.percentile(t, [50, 95])
+        rows.append({"section": name, "calls": len(t), "last_ms": round(t[-1], 2),
+                     "p50_ms": round(p50, 2), "p95_ms": round(p95, 2), "max_ms": round(t.max(), 2)})
+    return sorted(rows, key=lambda r: r["p95_ms"], reverse=True)
+
+
+def reset():
+    with _lock:
+        _timings.clear()
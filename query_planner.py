@@ -0,0 +1,190 @@
+import re
+
+import pandas as pd
+import plotly.express as px
+
+import profile_grid
+import profile_store
+import sql_store
+
+# most measurement rows a chat answer will pull from the store
+MAX_ROWS = 200_000
+
+# words in a question -> dashboard parameter names
+PARAM_WORDS = {
+    "Temperature": ("temperature", "temp"),
+    "Salinity": ("salinity", "psal", "salt"),
+    "Oxygen": ("oxygen", "doxy", "o2"),
+    "Chl-a": ("chlorophyll", "chl-a", "chla", "chl"),
+}
+
+# named areas -> (region partition, lat_range, lon_range)
+PLACES = {
+    "arabian sea": ("Indian Ocean", (5, 25), (50, 78)),
+    "bay of bengal": ("Indian Ocean", (5, 23), (80, 100)),
+    "equator": (None, (-5, 5), None),
+    "indian ocean": ("Indian Ocean", None, None),
+    "pacific": ("Pacific Ocean", None, None),
+    "atlantic": ("Atlantic Ocean", None, None),
+}
+
+MONTHS = {m: i for i, m in enumerate(
+    ["jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"], 1)}
+
+# a plausible year, not a depth such as "2000 m"
+YEAR = r"(?:19|20)\d{2}\b(?!\s*(?:m|dbar)\b)"
+
+# "around 70°E" covers this many degrees either side
+AROUND_DEG = 5
+
+
+class QueryPlan:
+    """
+    Structured form of a chat question.
+    kind:    "profile" (parameter vs depth), "timeseries" (monthly means),
+             "metadata" (about given floats) or "search" (nothing structured found)
+    params:  dashboard parameter names, e.g. ["Temperature"]
+    filters: keyword arguments for profile_store.read_profiles / pandas_query
+    """
+
+    def __init__(self, kind="search", params=None, filters=None):
+        self.kind = kind
+        self.params = params or []
+        self.filters = filters or {}
+
+    def __repr__(self):
+        return f"QueryPlan(kind={self.kind!r}, params={self.params!r}, filters={self.filters!r})"
+
+    def search_filters(self):
+        """The subset of filters pandas_query understands, so retrieval stays inside the slice."""
+        keys = ("lat_range", "lon_range", "date_range", "depth", "region")
+        return {k: v for k, v in self.filters.items() if k in keys}
+
+    def columns(self):
+        base = ["float_id", "cycle", "time", "latitude", "longitude", "pressure"]
+        return base + profile_store.param_columns(self.params)
+
+
+def _coord(text, hemispheres):
+    # 70°E, 70 E, 70e, -12.5°, 15 degrees north ...
+    m = re.search(r"(-?\d+(?:\.\d+)?)\s*(?:°|deg(?:rees)?)?\s*(" + hemispheres + r")\b", text)
+    if not m:
+        return None
+    value = float(m.group(1))
+    return -value if m.group(2)[0] in "sw" else value
+
+
+def parse(question: str) -> QueryPlan:
+    """Rule-based parser: keywords, coordinates, depths, dates and float ids."""
+    q = question.lower()
+    filters = {}
+
+    params = [p for p, words in PARAM_WORDS.items()
+              if any(re.search(rf"\b{re.escape(w)}\b", q) for w in words)]
+
+    for name, (region, lat, lon) in PLACES.items():
+        if name in q:
+            if region:
+                filters["region"] = region
+            if lat:
+                filters["lat_range"] = lat
+            if lon:
+                filters["lon_range"] = lon
+            break
+
+    lon = _coord(q, "e|east|w|west")
+    if lon is not None:
+        filters["lon_range"] = (lon - AROUND_DEG, lon + AROUND_DEG)
+    lat = _coord(q, "n|north|s|south")
+    if lat is not None:
+        filters["lat_range"] = (lat - AROUND_DEG, lat + AROUND_DEG)
+
+    # depth: "0-200 m", "between 100 and 500 m", "below 1000 m", "above 200 m"
+    if m := re.search(r"(\d+)\s*(?:-|–|to|and)\s*(\d+)\s*(?:m|dbar)\b", q):
+        filters["depth"] = (int(m.group(1)), int(m.group(2)))
+    elif m := re.search(r"(?:below|deeper than)\s*(\d+)\s*(?:m|dbar)\b", q):
+        filters["depth"] = (int(m.group(1)), 6000)
+    elif m := re.search(r"(?:above|shallower than)\s*(\d+)\s*(?:m|dbar)\b", q):
+        filters["depth"] = (0, int(m.group(1)))
+
+    # dates: "mar 2023", "in 2023", "last 6 months"/"6 mo"; years are 19xx/20xx and
+    # never followed by a unit, so "in 1000 m" stays a depth
+    if m := re.search(r"\b(" + "|".join(MONTHS) + r")[a-z]*\.?\s+(" + YEAR + r")", q):
+        start = pd.Timestamp(int(m.group(2)), MONTHS[m.group(1)], 1)
+        filters["date_range"] = [start, start + pd.offsets.MonthEnd(0)]
+    elif m := re.search(r"\b(?:in|during)\s+(" + YEAR + r")", q):
+        year = int(m.group(1))
+        filters["date_range"] = [pd.Timestamp(year, 1, 1), pd.Timestamp(year, 12, 31)]
+    elif m := re.search(r"(?:last|past)?\s*(\d+)\s*(?:months?|mo)\b", q):
+        end = pd.Timestamp.today().normalize()
+        filters["date_range"] = [end - pd.DateOffset(months=int(m.group(1))), end]
+
+    float_ids = [int(f) for f in re.findall(r"\b(\d{7})\b", q)]
+    if float_ids:
+        filters["float_ids"] = float_ids
+
+    if float_ids and ("metadata" in q or not params):
+        kind = "metadata"
+    elif params and re.search(r"\b(vs|versus|against)\b.*\b(depth|pressure)\b|\bprofiles?\b", q):
+        kind = "profile"
+    elif params and re.search(r"\b(trend|monthly|over time|time series|average|mean|compare)\b", q):
+        kind = "timeseries"
+    elif params or filters:
+        kind = "profile" if params else "search"
+    else:
+        kind = "search"
+    return QueryPlan(kind, params, filters)
+
+
+def _float_metadata(float_ids, root):
+    # the database's floats table when it is current; otherwise the same summary from
+    # the floats' own Parquet partitions (float_id is a partition key)
+    if sql_store.fresh(root):
+        return sql_store.float_metadata(float_ids)
+    rows = profile_store.read_profiles(columns=["float_id", "cycle", "time", "latitude", "longitude", "region"],
+                                       root=root, float_ids=float_ids).sort_values("time")
+    g = rows.groupby("float_id")
+    return pd.DataFrame({
+        "first_seen": g["time"].min(), "last_seen": g["time"].max(),
+        "last_lat": g["latitude"].last(), "last_lon": g["longitude"].last(),
+        "region": g["region"].last(), "cycles": g["cycle"].nunique(),
+    }).reset_index()
+
+
+def execute(plan: QueryPlan, root: str = profile_store.PROFILE_DIR):
+    """
+    Runs a plan against the profile data; only the plan's columns and the rows
+    matching its filters are read. Returns (text, figure or None).
+    """
+    if plan.kind == "metadata":
+        floats = _float_metadata(plan.filters.get("float_ids") or [], root)
+        if floats.empty:
+            return "🤖 I have no profiles for that float.", None
+        lines = [f"- **{f.float_id}**: {f.cycles} cycles, {f.first_seen:%Y-%m-%d} → {f.last_seen:%Y-%m-%d}, "
+                 f"last seen at {f.last_lat:.2f}°, {f.last_lon:.2f}° ({f.region})"
+                 for f in floats.itertuples()]
+        return "🤖 Float metadata:\n\n" + "\n".join(lines), None
+
+    params = plan.params or ["Temperature"]
+    plan = QueryPlan(plan.kind, params, plan.filters)
+    rows = sql_store.read(plan.columns(), limit=MAX_ROWS, root=root, **plan.filters)
+    if rows.empty:
+        return "🤖 No measurements match that selection.", None
+
+    cols = profile_store.param_columns(params)
+    n_profiles = len(rows[["float_id", "cycle"]].drop_duplicates())
+    summary = ", ".join(f"{p} mean {rows[c].mean():.2f}" for p, c in zip(params, cols))
+    text = f"🤖 {n_profiles:,} profiles match ({summary})."
+
+    if plan.kind == "timeseries":
+        monthly = rows.set_index("time")[cols].resample("MS").mean()
+        fig = px.line(monthly, labels={"value": "Mean", "time": "Month"})
+    else:
+        # every matched profile resampled onto the standard levels at once; the
+        # answer plots the mean profile per parameter over the depth window
+        means = profile_grid.build(rows, cols).mean_profiles(cols, plan.filters.get("depth"))
+        long = means.reset_index().melt(id_vars=["pressure"], value_vars=cols, var_name="parameter")
+        fig = px.line(long, x="value", y="pressure", color="parameter", markers=True,
+                      labels={"pressure": "Pressure (dbar)", "value": "Mean"})
+        fig.update_yaxes(autorange="reversed")
+    return text, fig
@@ -0,0 +1,180 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from atomic_files import MtimeCache, replacing
+from profile_store import PARAM_COLUMNS
+
+ROLLUP_DIR = os.environ.get("ROLLUP_DIR", os.path.join("data", "rollups"))
+MEASUREMENTS_FILE = "measurements.parquet"
+PROFILES_FILE = "profiles.parquet"
+
+# pressure band edges (m); band i covers [DEPTH_BANDS[i], DEPTH_BANDS[i+1])
+DEPTH_BANDS = np.array([0, 50, 100, 200, 500, 1000, 1500, 2000, 6000])
+
+# coarse lat/lon cell (degrees) of the profile table; cell i covers [i*CELL_DEG, (i+1)*CELL_DEG)
+CELL_DEG = 1.0
+# cell number of profiles without a position; no lat/lon window matches it
+NO_CELL = -999
+
+MEASUREMENT_KEYS = ["region", "month", "param", "depth_band"]
+# top_band/bottom_band: depth bands of a profile's shallowest and deepest level
+PROFILE_KEYS = ["region", "month", "lat_cell", "lon_cell", "top_band", "bottom_band"]
+
+_tables = MtimeCache(pd.read_parquet)
+
+
+def rollup_chunk(chunk):
+    """
+    Partial aggregates of one ingested chunk: (measurements, profiles).
+    Both hold sums and counts rather than means, so partials merge by plain addition.
+    A profile never spans two chunks, so counting (float_id, cycle) per chunk is exact.
+    """
+    chunk = chunk.assign(
+        month=pd.to_datetime(chunk["time"]).dt.strftime("%Y-%m"),
+        depth_band=np.searchsorted(DEPTH_BANDS, chunk["pressure"].to_numpy(), side="right") - 1,
+    )
+    parts = []
+    for param, col in PARAM_COLUMNS.items():
+        if col not in chunk.columns:
+            continue
+        g = chunk.dropna(subset=[col]).groupby(["region", "month", "depth_band"])[col]
+        part = g.agg(["sum", "count"]).reset_index()
+        part["param"] = param
+        parts.append(part)
+    measurements = (pd.concat(parts, ignore_index=True) if parts
+                    else pd.DataFrame(columns=MEASUREMENT_KEYS + ["sum", "count"]))
+
+    g = chunk.groupby(["float_id", "cycle"], sort=False)
+    first = g[["region", "month", "latitude", "longitude"]].first()
+    profiles = pd.DataFrame({
+        "region": first["region"],
+        "month": first["month"],
+        "lat_cell": _cell(first["latitude"]),
+        "lon_cell": _cell((first["longitude"] + 180) % 360 - 180),
+        "top_band": g["depth_band"].min(),
+        "bottom_band": g["depth_band"].max(),
+    })
+    profiles = profiles.groupby(PROFILE_KEYS).size().rename("profiles").reset_index()
+    return measurements, profiles
+
+
+def _cell(degrees):
+    cells = np.floor(degrees.to_numpy(dtype=np.float64) / CELL_DEG)
+    return np.where(np.isnan(cells), NO_CELL, cells).astype(np.int64)
+
+
+def merge(partials):
+    """Adds up a list of (measurements, profiles) partials into one pair."""
+    measurements = pd.concat([m for m, _ in partials], ignore_index=True)
+    profiles = pd.concat([p for _, p in partials], ignore_index=True)
+    return (measurements.groupby(MEASUREMENT_KEYS, as_index=False)[["sum", "count"]].sum(),
+            profiles.groupby(PROFILE_KEYS, as_index=False)["profiles"].sum())
+
+
+def _write(frame, path):
+    with replacing(path) as tmp:
+        frame.to_parquet(tmp, index=False)
+
+
+def _negate(partial):
+    measurements, profiles = partial
+    return (measurements.assign(sum=-measurements["sum"], count=-measurements["count"]),
+            profiles.assign(profiles=-profiles["profiles"]))
+
+
+def update(partials, root: str = ROLLUP_DIR, removed=()):
+    """
+    Folds freshly ingested partials into the stored rollups (a few thousand rows at most).
+    removed: partials of rows deleted from the store (e.g. re-ingested files), subtracted.
+    """
+    partials = list(partials) + [_negate(p) for p in removed]
+    if not partials:
+        return
+    os.makedirs(root, exist_ok=True)
+    if exists(root):
+        partials = [load(root)] + partials
+    measurements, profiles = merge(partials)
+    measurements = measurements[measurements["count"] > 0]
+    profiles = profiles[profiles["profiles"] > 0]
+    _write(measurements, os.path.join(root, MEASUREMENTS_FILE))
+    _write(profiles, os.path.join(root, PROFILES_FILE))
+
+
+def exists(root: str = ROLLUP_DIR):
+    return (os.path.exists(os.path.join(root, MEASUREMENTS_FILE))
+            and os.path.exists(os.path.join(root, PROFILES_FILE)))
+
+
+def version(root: str = ROLLUP_DIR):
+    """Changes whenever the rollups are rewritten; 0 if there are none."""
+    try:
+        return os.stat(os.path.join(root, PROFILES_FILE)).st_mtime_ns
+    except OSError:
+        return 0
+
+
+def load(root: str = ROLLUP_DIR):
+    """(measurements, profiles) rollup tables; re-read only when the files change."""
+    return _tables.get(os.path.join(root, MEASUREMENTS_FILE)), _tables.get(os.path.join(root, PROFILES_FILE))
+
+
+def _months(frame, date_range):
+    date_range = list(date_range or [])
+    if not date_range:
+        return frame
+    lo = pd.Timestamp(date_range[0]).strftime("%Y-%m")
+    hi = pd.Timestamp(date_range[-1]).strftime("%Y-%m") if len(date_range) > 1 else "9999-12"
+    return frame[(frame["month"] >= lo) & (frame["month"] <= hi)]
+
+
+def _bands(depth):
+    # (first, last) depth band overlapping a (min, max) pressure window
+    lo = np.searchsorted(DEPTH_BANDS, depth[0], side="right") - 1
+    hi = np.searchsorted(DEPTH_BANDS, depth[1], side="left") - 1
+    return lo, max(hi, lo)
+
+
+def monthly_means(params, region=None, depth=None, date_range=None, root: str = ROLLUP_DIR):
+    """
+    Month x parameter table of mean values for the Overview chart.
+    Depth bands overlapping the `depth` window are included.
+    """
+    measurements, _ = load(root)
+    m = measurements[measurements["param"].isin(list(params))]
+    if region:
+        m = m[m["region"] == region]
+    if depth:
+        lo, hi = _bands(depth)
+        m = m[(m["depth_band"] >= lo) & (m["depth_band"] <= hi)]
+    m = _months(m, date_range)
+    g = m.groupby(["month", "param"])[["sum", "count"]].sum()
+    return (g["sum"] / g["count"]).unstack("param").sort_index()
+
+
+def total_profiles(region=None, date_range=None, depth=None, lat_range=None, lon_range=None,
+                   root: str = ROLLUP_DIR):
+    """
+    Number of profiles inside the filters, for the Total Profiles KPI. Resolved to the
+    rollups' keys: a profile counts when its month, CELL_DEG lat/lon cell and span of
+    depth bands overlap the windows, so edges are counted generously.
+    """
+    _, profiles = load(root)
+    if region:
+        profiles = profiles[profiles["region"] == region]
+    profiles = _months(profiles, date_range)
+    if depth:
+        lo, hi = _bands(depth)
+        profiles = profiles[(profiles["top_band"] <= hi) & (profiles["bottom_band"] >= lo)]
+    if lat_range:
+        lo, hi = np.floor(np.asarray(lat_range, dtype=np.float64) / CELL_DEG)
+        profiles = profiles[(profiles["lat_cell"] >= lo) & (profiles["lat_cell"] <= hi)]
+    if lon_range:
+        lo, hi = np.floor(np.asarray(lon_range, dtype=np.float64) / CELL_DEG)
+        cell = profiles["lon_cell"]
+        if lo <= hi:
+            profiles = profiles[(cell >= lo) & (cell <= hi)]
+        else:  # the window wraps past 180
+            profiles = profiles[((cell >= lo) | (cell <= hi)) & (cell != NO_CELL)]
+    return int(profiles["profiles"].sum())
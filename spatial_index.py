@@ -0,0 +1,105 @@
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0088
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Great-circle distance in km; works elementwise on arrays."""
+    lat1, lon1, lat2, lon2 = map(np.radians, (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+class GridIndex:
+    """
+    Fixed lat/lon grid over float positions, built once.
+    Points are sorted by cell id (row-major), so every grid row of a bounding box is
+    one contiguous slice found by binary search; only points in those cells are checked.
+    nearest() grows a spherical cap around the query point until it holds k floats.
+    """
+
+    def __init__(self, lat, lon, cell_deg: float = 1.0):
+        lat = np.asarray(lat, dtype=np.float64)
+        lon = (np.asarray(lon, dtype=np.float64) + 180.0) % 360.0 - 180.0
+        self.cell_deg = cell_deg
+        self.n_rows = int(np.ceil(180.0 / cell_deg))
+        self.n_cols = int(np.ceil(360.0 / cell_deg))
+
+        cells = self._row(lat) * self.n_cols + self._col(lon)
+        order = np.argsort(cells, kind="stable")
+        self.cells = cells[order]
+        self.ids = order.astype(np.intp)
+        self.lat = lat[order]
+        self.lon = lon[order]
+
+    def __len__(self):
+        return len(self.ids)
+
+    def _row(self, lat):
+        return np.clip(np.floor((np.asarray(lat) + 90.0) / self.cell_deg), 0, self.n_rows - 1).astype(np.int64)
+
+    def _col(self, lon):
+        return np.clip(np.floor((np.asarray(lon) + 180.0) / self.cell_deg), 0, self.n_cols - 1).astype(np.int64)
+
+    def _candidates(self, lat_lo, lat_hi, lon_lo, lon_hi):
+        """Positions (into the sorted arrays) of every point inside the box; lon_lo > lon_hi wraps."""
+        rows = np.arange(self._row(lat_lo), self._row(lat_hi) + 1)
+        c_lo, c_hi = self._col(lon_lo), self._col(lon_hi)
+        if lon_lo <= lon_hi:
+            col_spans = [(c_lo, c_hi)]
+        elif c_hi >= c_lo:
+            # a wrapped box that starts and ends in the same column touches every
+            # column; two overlapping spans would list those points twice
+            col_spans = [(0, self.n_cols - 1)]
+        else:
+            col_spans = [(c_lo, self.n_cols - 1), (0, c_hi)]
+
+        starts, stops = [], []
+        for c0, c1 in col_spans:
+            starts.append(np.searchsorted(self.cells, rows * self.n_cols + c0, side="left"))
+            stops.append(np.searchsorted(self.cells, rows * self.n_cols + c1, side="right"))
+        starts, stops = np.concatenate(starts), np.concatenate(stops)
+        keep = stops > starts
+        if not keep.any():
+            return np.empty(0, dtype=np.intp)
+        pos = np.concatenate([np.arange(a, b) for a, b in zip(starts[keep], stops[keep])])
+
+        # edge cells stick out of the box, so check the points themselves
+        lat, lon = self.lat[pos], self.lon[pos]
+        inside = (lat >= lat_lo) & (lat <= lat_hi)
+        if lon_lo <= lon_hi:
+            inside &= (lon >= lon_lo) & (lon <= lon_hi)
+        else:
+            inside &= (lon >= lon_lo) | (lon <= lon_hi)
+        return pos[inside]
+
+    def bbox(self, lat_range, lon_range):
+        """Sorted original row positions of the floats inside lat_range x lon_range."""
+        return np.sort(self.ids[self._candidates(lat_range[0], lat_range[1], lon_range[0], lon_range[1])])
+
+    def nearest(self, lat: float, lon: float, k: int = 5):
+        """Original row positions and haversine distances (km) of the k nearest floats, closest first."""
+        k = min(k, len(self))
+        if k <= 0:
+            return np.empty(0, dtype=np.intp), np.empty(0)
+
+        radius = np.radians(self.cell_deg)
+        while True:
+            radius_deg = np.degrees(radius)
+            lat_lo, lat_hi = lat - radius_deg, lat + radius_deg
+            if radius >= np.pi or lat_lo <= -90 or lat_hi >= 90:
+                # the cap reaches a pole (or covers the globe): every longitude is in play
+                lon_lo, lon_hi = -180.0, 180.0
+            else:
+                # longitude half-width of a spherical cap
+                dlon = np.degrees(np.arcsin(np.sin(radius) / np.cos(np.radians(lat))))
+                lon_lo = (lon - dlon + 180.0) % 360.0 - 180.0
+                lon_hi = (lon + dlon + 180.0) % 360.0 - 180.0
+            pos = self._candidates(max(lat_lo, -90.0), min(lat_hi, 90.0), lon_lo, lon_hi)
+            dist = haversine_km(lat, lon, self.lat[pos], self.lon[pos])
+            within = dist <= radius * EARTH_RADIUS_KM
+            if within.sum() >= k or radius >= np.pi:
+                pos, dist = pos[within], dist[within]
+                best = np.argsort(dist, kind="stable")[:k]
+                return self.ids[pos[best]], dist[best]
+            radius = min(radius * 2, np.pi)
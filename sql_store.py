@@ -0,0 +1,212 @@
+import os
+import threading
+
+import duckdb
+import pandas as pd
+
+import profile_store
+from atomic_files import replacing
+
+DB_PATH = os.environ.get("ARGO_DB", os.path.join("data", "argo.duckdb"))
+
+SCHEMA = """
+CREATE TABLE floats (
+    float_id   BIGINT PRIMARY KEY,
+    first_seen TIMESTAMP,
+    last_seen  TIMESTAMP,
+    last_lat   DOUBLE,
+    last_lon   DOUBLE,
+    region     VARCHAR,
+    cycles     INTEGER
+);
+CREATE TABLE cycles (
+    float_id  BIGINT,
+    cycle     INTEGER,
+    time      TIMESTAMP,
+    latitude  DOUBLE,
+    longitude DOUBLE,
+    region    VARCHAR,
+    PRIMARY KEY (float_id, cycle)
+);
+-- time/position are repeated per level so filters never need a join
+CREATE TABLE measurements (
+    float_id    BIGINT,
+    cycle       INTEGER,
+    time        TIMESTAMP,
+    latitude    DOUBLE,
+    longitude   DOUBLE,
+    region      VARCHAR,
+    pressure    REAL,
+    temperature REAL,
+    salinity    REAL,
+    oxygen      REAL,
+    chla        REAL
+);
+"""
+
+# ART indexes only on the small per-cycle table; measurements get none, since DuckDB
+# doesn't use ART indexes for range predicates. Their per-row-group min/max zone maps
+# do the pruning instead, which is why measurements are inserted sorted by time then pressure
+INDEXES = """
+CREATE INDEX cycles_time ON cycles (time);
+CREATE INDEX cycles_position ON cycles (latitude, longitude);
+"""
+
+MEASUREMENT_COLUMNS = ["float_id", "cycle", "time", "latitude", "longitude", "region",
+                       "pressure", "temperature", "salinity", "oxygen", "chla"]
+
+_local = threading.local()
+
+
+def exists(db_path: str = DB_PATH):
+    return os.path.exists(db_path)
+
+
+def version(db_path: str = DB_PATH):
+    """Changes whenever the database is rebuilt; 0 if there is none."""
+    try:
+        return os.stat(db_path).st_mtime_ns
+    except OSError:
+        return 0
+
+
+def fresh(root: str = profile_store.PROFILE_DIR, db_path: str = DB_PATH):
+    """True if the database exists and was built after the last write to the profile store."""
+    return exists(db_path) and version(db_path) >= profile_store.version(root)
+
+
+def rebuild(root: str = profile_store.PROFILE_DIR, db_path: str = DB_PATH):
+    """Builds a fresh database from the Parquet profile store, then swaps it in."""
+    os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+    with replacing(db_path) as tmp:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        con = duckdb.connect(tmp)
+        try:
+            con.execute(SCHEMA)
+            parquet = os.path.join(root, "**", "*.parquet").replace("'", "''")
+            con.execute(f"""
+                INSERT INTO measurements
+                SELECT {", ".join(MEASUREMENT_COLUMNS)}
+                FROM read_parquet('{parquet}', hive_partitioning = true)
+                ORDER BY time, pressure
+            """)
+            con.execute("""
+                INSERT INTO cycles
+                SELECT float_id, cycle, min(time) AS time, any_value(latitude) AS latitude,
+                       any_value(longitude) AS longitude, any_value(region) AS region
+                FROM measurements GROUP BY float_id, cycle
+                ORDER BY time
+            """)
+            con.execute("""
+                INSERT INTO floats
+                SELECT float_id, min(time), max(time), arg_max(latitude, time), arg_max(longitude, time),
+                       arg_max(region, time), count(*)
+                FROM cycles GROUP BY float_id
+            """)
+            con.execute(INDEXES)
+            con.execute("CHECKPOINT")
+        finally:
+            con.close()
+
+
+def _cursor(db_path: str = DB_PATH):
+    # one read-only connection per thread; reopened if the file was rebuilt
+    mtime = os.path.getmtime(db_path)
+    con = getattr(_local, "con", None)
+    if con is None or _local.mtime != mtime or _local.path != db_path:
+        if con is not None:
+            con.close()
+        con = duckdb.connect(db_path, read_only=True)
+        _local.con, _local.mtime, _local.path = con, mtime, db_path
+    return con
+
+
+def _where(date_range=None, depth=None, region=None, lat_range=None, lon_range=None, float_ids=None):
+    """WHERE clause with ? placeholders plus its parameters, for the dashboard filters."""
+    terms, params = [], []
+    date_range = list(date_range or [])
+    if date_range:
+        terms.append("time >= ?")
+        params.append(pd.Timestamp(date_range[0]).to_pydatetime())
+        if len(date_range) > 1:
+            terms.append("time < ?")
+            params.append((pd.Timestamp(date_range[-1]) + pd.Timedelta(days=1)).to_pydatetime())
+    if depth:
+        terms.append("pressure BETWEEN ? AND ?")
+        params += [float(depth[0]), float(depth[1])]
+    if region:
+        terms.append("region = ?")
+        params.append(region)
+    if lat_range:
+        terms.append("latitude BETWEEN ? AND ?")
+        params += [float(lat_range[0]), float(lat_range[1])]
+    if lon_range:
+        lo, hi = float(lon_range[0]), float(lon_range[1])
+        terms.append("longitude BETWEEN ? AND ?" if lo <= hi else "(longitude >= ? OR longitude <= ?)")
+        params += [lo, hi]
+    if float_ids is not None:
+        terms.append("list_contains(?, float_id)")
+        params.append([int(f) for f in float_ids])
+    return ("WHERE " + " AND ".join(terms)) if terms else "", params
+
+
+def read_measurements(columns=None, limit: int = None, db_path: str = DB_PATH, order_by=None, **filters):
+    """
+    Same contract as profile_store.read_profiles, answered by the embedded database.
+    order_by: optional measurement columns to sort by (applied before `limit`).
+    """
+    columns = columns or MEASUREMENT_COLUMNS
+    unknown = (set(columns) | set(order_by or [])) - set(MEASUREMENT_COLUMNS)
+    if unknown:
+        raise ValueError(f"unknown columns: {sorted(unknown)}")
+    where, params = _where(**filters)
+    sql = f"SELECT {', '.join(columns)} FROM measurements {where}"
+    if order_by:
+        sql += f" ORDER BY {', '.join(order_by)}"
+    if limit is not None:
+        sql += " LIMIT ?"
+        params.append(int(limit))
+    return _cursor(db_path).execute(sql, params).df()
+
+
+def read(columns=None, limit: int = None, root: str = profile_store.PROFILE_DIR,
+         db_path: str = DB_PATH, whole_profiles: bool = False, **filters):
+    """
+    Measurements from the database when it is up to date with the Parquet store,
+    else straight from the Parquet store (e.g. after an ingest, until the rebuild).
+    whole_profiles: with `limit`, keep each profile's rows together (float_id and cycle
+    must be among the columns); the caller can then drop the last, possibly cut, one.
+    Parquet files already hold each profile contiguously.
+    """
+    if fresh(root, db_path):
+        order_by = ["float_id", "cycle"] if whole_profiles and limit is not None else None
+        return read_measurements(columns, limit=limit, db_path=db_path, order_by=order_by, **filters)
+    return profile_store.read_profiles(columns=columns, root=root, limit=limit, **filters)
+
+
+def count_profiles(db_path: str = DB_PATH, **filters):
+    """
+    Distinct (float, cycle) profiles with at least one level inside the filters.
+    Without a depth window this is a count over the cycles table (one row per profile).
+    """
+    where, params = _where(**filters)
+    if filters.get("depth"):
+        sql = f"SELECT count(*) FROM (SELECT DISTINCT float_id, cycle FROM measurements {where})"
+    else:
+        sql = f"SELECT count(*) FROM cycles {where}"
+    return int(_cursor(db_path).execute(sql, params).fetchone()[0])
+
+
+def float_metadata(float_ids, db_path: str = DB_PATH):
+    """
+    One row per float from the floats table: float_id, first_seen, last_seen,
+    last_lat, last_lon, region, cycles.
+    """
+    sql = "SELECT * FROM floats WHERE list_contains(?, float_id) ORDER BY float_id"
+    return _cursor(db_path).execute(sql, [[int(f) for f in float_ids]]).df()
+
+
+if __name__ == "__main__":
+    # python sql_store.py  ->  rebuild data/argo.duckdb from the Parquet store
+    rebuild()
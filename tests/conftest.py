@@ -0,0 +1,35 @@
+import os
+import sys
+
+import pytest
+
+# the app's modules live at the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def write_argo_file():
+    """Factory writing a small synthetic ARGO profile file: (path, float_id, lats, lons, days)."""
+    netCDF4 = pytest.importorskip("netCDF4")
+    np = pytest.importorskip("numpy")
+
+    def write(path, float_id=4901234, lats=(-5.0, 10.0), lons=(70.0, 80.0), days=(26723.5, 26733.5),
+              pressures=(5.0, 50.0, 500.0)):
+        n_prof, n_levels = len(lats), len(pressures)
+        with netCDF4.Dataset(path, "w") as nc:
+            nc.createDimension("N_PROF", n_prof)
+            nc.createDimension("N_LEVELS", n_levels)
+            nc.createDimension("STRING8", 8)
+            platform = nc.createVariable("PLATFORM_NUMBER", "S1", ("N_PROF", "STRING8"))
+            platform[:] = np.array([list(str(float_id).ljust(8))] * n_prof, dtype="S1")
+            nc.createVariable("CYCLE_NUMBER", "i4", ("N_PROF",))[:] = np.arange(1, n_prof + 1)
+            nc.createVariable("JULD", "f8", ("N_PROF",))[:] = np.asarray(days)
+            nc.createVariable("LATITUDE", "f8", ("N_PROF",))[:] = np.asarray(lats)
+            nc.createVariable("LONGITUDE", "f8", ("N_PROF",))[:] = np.asarray(lons)
+            pres = np.tile(np.asarray(pressures, dtype=np.float32), (n_prof, 1))
+            nc.createVariable("PRES", "f4", ("N_PROF", "N_LEVELS"), fill_value=99999.0)[:] = pres
+            nc.createVariable("TEMP", "f4", ("N_PROF", "N_LEVELS"), fill_value=99999.0)[:] = 28 - pres / 50
+            nc.createVariable("PSAL", "f4", ("N_PROF", "N_LEVELS"), fill_value=99999.0)[:] = 35 + pres / 1000
+        return path
+
+    return write
@@ -0,0 +1,43 @@
+import os
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from atomic_files import MtimeCache, replacing, save_json, save_npy
+
+
+def test_failed_write_leaves_the_old_file(tmp_path):
+    path = str(tmp_path / "data.json")
+    save_json(path, {"a": 1})
+    with pytest.raises(RuntimeError):
+        with replacing(path) as tmp:
+            with open(tmp, "w") as f:
+                f.write("{half")
+            raise RuntimeError
+    assert open(path).read() == '{"a": 1}'
+    assert os.listdir(tmp_path) == ["data.json"]
+
+
+def test_save_npy_keeps_the_given_name(tmp_path):
+    path = str(tmp_path / "x.npy")
+    save_npy(path, np.arange(3))
+    assert os.listdir(tmp_path) == ["x.npy"]
+    assert np.load(path).tolist() == [0, 1, 2]
+
+
+def test_mtime_cache_reloads_only_changed_files(tmp_path):
+    path = str(tmp_path / "x.npy")
+    save_npy(path, np.arange(3))
+    loads = []
+    cache = MtimeCache(lambda p: loads.append(p) or np.load(p))
+    assert cache.get(path).tolist() == [0, 1, 2]
+    assert cache.get(path).tolist() == [0, 1, 2]
+    assert len(loads) == 1
+
+    save_npy(path, np.arange(4))
+    os.utime(path, ns=(0, os.stat(path).st_mtime_ns + 1_000_000_000))
+    assert cache.get(path).tolist() == [0, 1, 2, 3]
+    assert len(loads) == 2
+    with pytest.raises(OSError):
+        cache.get(str(tmp_path / "missing.npy"))
@@ -0,0 +1,45 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("duckdb")
+pytest.importorskip("pyarrow")
+
+import climatology
+from atomic_files import save_npy
+
+
+@pytest.mark.parametrize("lon_range, expected", [
+    ((60, 60), [240]),
+    ((60, 62), [240, 241]),
+    ((-180, 180), list(range(360))),
+    ((179, -179), [359, 0]),
+])
+def test_cells_longitude_windows(lon_range, expected):
+    _, lon = climatology._cells(None, lon_range)
+    assert lon.tolist() == expected
+
+
+def test_cells_zero_width_latitude_covers_one_row():
+    lat, _ = climatology._cells((0, 0), None)
+    assert (lat.start, lat.stop) == (90, 91)
+
+
+def test_mean_grid_merges_cells_into_the_budget(tmp_path):
+    shape = (len(climatology.PARAMS), climatology.N_BANDS, climatology.N_LAT, climatology.N_LON)
+    counts = np.random.default_rng(0).integers(0, 3, shape).astype(np.int32)
+    sums = (counts * 2.0).astype(np.float32)
+    out = str(tmp_path)
+    save_npy(str(tmp_path / "2023-03.sum.npy"), sums)
+    save_npy(str(tmp_path / "2023-03.count.npy"), counts)
+    (tmp_path / climatology.MANIFEST_FILE).write_text('{"months": ["2023-03"]}')
+    clim = climatology.Climatology(out)
+
+    full = clim.mean_grid("Temperature", ["2023-03"])
+    grid = clim.mean_grid("Temperature", ["2023-03"], budget=5000)
+    assert len(full) > 5000 >= len(grid)
+    assert grid["count"].sum() == full["count"].sum()
+    assert (grid["value"] == 2.0).all()
+
+    wrapped = clim.mean_grid("Temperature", ["2023-03"], lon_range=(170, -170), budget=50)
+    assert len(wrapped) <= 50
+    assert set(wrapped["lon"]) <= set(range(-180, -169)) | set(range(170, 181))
@@ -0,0 +1,21 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+pd = pytest.importorskip("pandas")
+
+from downsample import bin_points
+
+
+@pytest.mark.parametrize("lat_range, lon_range", [((-60, 60), (-180, 180)), ((-20, 20), (170, -170))])
+def test_bin_points_keeps_every_point_within_budget(lat_range, lon_range):
+    rng = np.random.default_rng(0)
+    lat = rng.uniform(*lat_range, 20_000)
+    lon = (rng.uniform(0, (lon_range[1] - lon_range[0]) % 360 or 360, 20_000) + lon_range[0] + 180) % 360 - 180
+    out = bin_points(pd.DataFrame({"lat": lat, "lon": lon}), lat_range, lon_range, budget=500)
+    assert len(out) <= 500
+    assert out["count"].sum() == 20_000
+
+
+def test_bin_points_returns_small_frames_unchanged():
+    frame = pd.DataFrame({"lat": [0.0, 1.0], "lon": [70.0, 71.0]})
+    assert bin_points(frame, (-10, 10), (60, 80), budget=500) is frame
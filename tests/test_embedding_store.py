@@ -0,0 +1,109 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("sentence_transformers")
+
+import embedding_store
+import embeddings
+from embedding_store import EmbeddingStore
+
+
+class StubModel:
+    """Deterministic stand-in for a SentenceTransformer: one fixed vector per text."""
+    dim = 8
+
+    def __init__(self):
+        self.encoded = []
+
+    def get_sentence_embedding_dimension(self):
+        return self.dim
+
+    def encode(self, texts, batch_size=None, convert_to_numpy=True, normalize_embeddings=False):
+        self.encoded += list(texts)
+        out = np.stack([np.random.default_rng(int(embedding_store.text_hash(t)[:8], 16)).standard_normal(self.dim)
+                        for t in texts]).astype(np.float32)
+        if normalize_embeddings:
+            out /= np.linalg.norm(out, axis=1, keepdims=True)
+        return out
+
+
+@pytest.fixture
+def model(monkeypatch):
+    stub = StubModel()
+    monkeypatch.setitem(embeddings._models, "stub", stub)
+    return stub
+
+
+def _vectors(store, positions):
+    return np.concatenate(store.segments)[positions]
+
+
+def test_sync_appends_only_new_texts(tmp_path, model):
+    store = EmbeddingStore("stub", str(tmp_path))
+    first = store.sync(["a", "b", "c"])
+    assert first.tolist() == [0, 1, 2]
+    assert model.encoded == ["a", "b", "c"]
+
+    again = EmbeddingStore("stub", str(tmp_path)).sync(["c", "a", "d", "a"])
+    assert again.tolist() == [2, 0, 3, 0]
+    assert model.encoded == ["a", "b", "c", "d"]
+
+
+def test_removed_texts_are_tombstoned_and_can_come_back(tmp_path, model, monkeypatch):
+    monkeypatch.setattr(embedding_store, "COMPACT_RATIO", 1.0)
+    store = EmbeddingStore("stub", str(tmp_path))
+    store.sync(["a", "b", "c", "d"])
+    store.sync(["a", "c", "d"])
+    assert store.tombstones.tolist() == [1]
+    assert "b" not in model.encoded[4:]
+
+    # a tombstoned text is encoded again as a new row rather than revived
+    positions = EmbeddingStore("stub", str(tmp_path)).sync(["a", "b"])
+    assert positions.tolist() == [0, 4]
+    assert model.encoded[4:] == ["b"]
+
+
+def test_compact_renumbers_rows_and_keeps_vectors(tmp_path, model, monkeypatch):
+    monkeypatch.setattr(embedding_store, "COMPACT_RATIO", 1.0)
+    texts = [f"text {i}" for i in range(10)]
+    store = EmbeddingStore("stub", str(tmp_path))
+    before = _vectors(store, store.sync(texts))
+    keep = texts[::2]
+    store.sync(keep)
+    assert len(store.tombstones) == 5
+
+    store.compact()
+    reopened = EmbeddingStore("stub", str(tmp_path))
+    assert len(reopened) == 5 and not len(reopened.tombstones)
+    assert len(reopened.segment_names) == 1
+    positions = reopened.sync(keep)
+    assert positions.tolist() == [0, 1, 2, 3, 4]
+    assert np.array_equal(_vectors(reopened, positions), before[::2])
+
+
+def test_sync_compacts_past_the_ratio(tmp_path, model):
+    store = EmbeddingStore("stub", str(tmp_path))
+    store.sync(["a", "b", "c", "d"])
+    assert store.sync(["c", "d"]).tolist() == [0, 1]
+    assert len(store) == 2 and not len(store.tombstones)
+
+
+def test_ivf_lists_persist_and_are_dropped_by_compact(tmp_path, model, monkeypatch):
+    monkeypatch.setattr(embedding_store, "COMPACT_RATIO", 1.0)
+    texts = [f"text {i}" for i in range(40)]
+    store = EmbeddingStore("stub", str(tmp_path))
+    store.sync(texts)
+    centroids, lists = store.ivf_lists(n_lists=4)
+    assert len(lists) == 40
+
+    # appended rows are assigned to the existing centroids, not retrained
+    store.sync(texts + ["text 40", "text 41"])
+    again, more = EmbeddingStore("stub", str(tmp_path)).ivf_lists(n_lists=4)
+    assert np.array_equal(again, centroids)
+    assert np.array_equal(more[:40], lists) and len(more) == 42
+
+    store.sync(texts[:20])
+    store.compact()
+    assert not (tmp_path / "stub" / "ivf-lists.npy").exists()
+    _, after = store.ivf_lists(n_lists=4)
+    assert len(after) == len(store) == 20
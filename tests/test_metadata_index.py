@@ -0,0 +1,69 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+pd = pytest.importorskip("pandas")
+
+from metadata_index import MetadataIndex
+
+
+@pytest.fixture
+def catalog():
+    return pd.DataFrame({
+        "latitude": [-10.0, 0.0, 5.0, 20.0, 40.0],
+        "longitude": [178.0, -179.5, 70.0, -60.0, 179.9],
+        "time": pd.to_datetime(["2023-01-05 00:00:00", "2023-03-01 00:00:00", "2023-03-31 23:00:00", "2023-04-01 00:00:00", "2024-06-10 00:00:00"]),
+        "pressure": [5.0, 100.0, 500.0, 1000.0, 2000.0],
+        "region": ["Pacific Ocean", "Pacific Ocean", "Indian Ocean", "Atlantic Ocean", "Pacific Ocean"],
+    })
+
+
+def _brute(catalog, lon_range=None, lat_range=None, date_range=None, depth=None, region=None):
+    mask = np.ones(len(catalog), dtype=bool)
+    if lon_range:
+        lo, hi = lon_range
+        lon = catalog["longitude"]
+        mask &= ((lon >= lo) & (lon <= hi)) if lo <= hi else ((lon >= lo) | (lon <= hi))
+    if lat_range:
+        mask &= catalog["latitude"].between(*lat_range)
+    if date_range:
+        mask &= catalog["time"] >= pd.Timestamp(date_range[0])
+        if len(date_range) > 1:
+            mask &= catalog["time"] < pd.Timestamp(date_range[-1]) + pd.Timedelta(days=1)
+    if depth:
+        mask &= catalog["pressure"].between(*depth)
+    if region:
+        mask &= catalog["region"] == region
+    return np.flatnonzero(mask).tolist()
+
+
+def test_no_applicable_filter_returns_none(catalog):
+    assert MetadataIndex(catalog).select() is None
+    assert MetadataIndex(catalog).select(date_range=[]) is None
+
+
+def test_wrapped_lon_range_is_the_union_of_both_sides(catalog):
+    assert MetadataIndex(catalog).select(lon_range=(170, -170)).tolist() == [0, 1, 4]
+    assert MetadataIndex(catalog).select(lon_range=(179, -179.5)).tolist() == [1, 4]
+
+
+def test_one_date_leaves_the_upper_bound_open(catalog):
+    index = MetadataIndex(catalog)
+    assert index.select(date_range=[pd.Timestamp("2023-03-01")]).tolist() == [1, 2, 3, 4]
+    # a closed range includes the whole of its end date
+    assert index.select(date_range=["2023-03-01", "2023-03-31"]).tolist() == [1, 2]
+
+
+@pytest.mark.parametrize("filters", [
+    {"lon_range": (170, -170), "lat_range": (-5, 50)},
+    {"lon_range": (170, -170), "region": "Pacific Ocean", "depth": (50, 3000)},
+    {"date_range": ["2023-03-01"], "region": "Pacific Ocean"},
+    {"date_range": ["2023-01-01", "2023-12-31"], "depth": (0, 600), "lat_range": (-20, 10)},
+    {"region": "Southern Ocean", "lat_range": (-90, 90)},
+])
+def test_filters_intersect(catalog, filters):
+    assert MetadataIndex(catalog).select(**filters).tolist() == _brute(catalog, **filters)
+
+
+def test_unknown_filter_is_rejected(catalog):
+    with pytest.raises(ValueError):
+        MetadataIndex(catalog).select(salinity=(30, 40))
@@ -0,0 +1,69 @@
+import os
+
+import pytest
+
+pytest.importorskip("netCDF4")
+pytest.importorskip("pyarrow")
+
+import netcdf_ingest
+import profile_store
+import rollups
+import sql_store
+
+
+def test_ingest_directory_writes_profiles_and_rollups(tmp_path, write_argo_file):
+    src = tmp_path / "nc"
+    src.mkdir()
+    write_argo_file(str(src / "R4901234_001.nc"))
+    root = str(tmp_path / "profiles")
+    rollup_dir = str(tmp_path / "rollups")
+
+    assert netcdf_ingest.ingest_directory(str(src), root=root, workers=1, rollup_dir=rollup_dir) == 6
+
+    rows = profile_store.read_profiles(root=root)
+    assert len(rows) == 6
+    assert set(rows["float_id"]) == {4901234}
+    assert sorted(rows["cycle"].unique()) == [1, 2]
+    assert rollups.exists(rollup_dir)
+    assert rollups.total_profiles(root=rollup_dir) == 2
+
+
+def test_reingest_is_idempotent_and_replaces_updated_files(tmp_path, write_argo_file):
+    src = tmp_path / "nc"
+    src.mkdir()
+    path = write_argo_file(str(src / "R4901234_001.nc"))
+    root = str(tmp_path / "profiles")
+    rollup_dir = str(tmp_path / "rollups")
+
+    netcdf_ingest.ingest_directory(str(src), root=root, workers=1, rollup_dir=rollup_dir)
+    assert netcdf_ingest.ingest_directory(str(src), root=root, workers=1, rollup_dir=rollup_dir) == 0
+    assert len(profile_store.read_profiles(root=root)) == 6
+    assert rollups.total_profiles(root=rollup_dir) == 2
+
+    # the file is updated in place with one more profile
+    write_argo_file(path, lats=(-5.0, 10.0, 12.0), lons=(70.0, 80.0, 81.0), days=(26723.5, 26733.5, 26743.5))
+    os.utime(path, ns=(os.stat(path).st_atime_ns, os.stat(path).st_mtime_ns + 1_000_000_000))
+    assert netcdf_ingest.ingest_directory(str(src), root=root, workers=1, rollup_dir=rollup_dir) == 9
+    assert len(profile_store.read_profiles(root=root)) == 9
+    assert rollups.total_profiles(root=rollup_dir) == 3
+    measurements, _ = rollups.load(rollup_dir)
+    assert measurements["count"].sum() == 9 * 2  # temperature and salinity per level
+
+
+def test_ingest_rebuilds_the_given_database(tmp_path, write_argo_file):
+    src = tmp_path / "nc"
+    src.mkdir()
+    write_argo_file(str(src / "R4901234_001.nc"))
+    root = str(tmp_path / "profiles")
+    rollup_dir = str(tmp_path / "rollups")
+    db = str(tmp_path / "argo.duckdb")
+    defaults = sql_store.version(), rollups.version()
+
+    netcdf_ingest.ingest_directory(str(src), root=root, workers=1, rollup_dir=rollup_dir)
+    sql_store.rebuild(root, db)
+    write_argo_file(str(src / "R4901235_001.nc"), float_id=4901235)
+    netcdf_ingest.ingest_directory(str(src), root=root, workers=1, db_path=db, rollup_dir=rollup_dir)
+
+    assert sql_store.fresh(root, db)
+    assert sql_store.count_profiles(db_path=db) == 4
+    assert (sql_store.version(), rollups.version()) == defaults  # the default stores are untouched
@@ -0,0 +1,31 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+pd = pytest.importorskip("pandas")
+
+import profile_grid
+
+
+def test_interpolate_matches_np_interp_per_profile():
+    levels = np.array([0, 50, 100, 150, 200], dtype=np.float32)
+    profile = np.array([1, 0, 0, 1, 0, 1])
+    pressure = np.array([10.0, 0.0, 100.0, 60.0, 180.0, 160.0])
+    values = np.array([1.0, 20.0, 10.0, 2.0, 4.0, 3.0])
+    out = profile_grid.interpolate(profile, pressure, values, levels)
+    assert out.shape == (2, 5)
+    assert np.allclose(out[0, :4], np.interp(levels[:4], [0, 100, 180], [20, 10, 4]))
+    assert np.isnan(out[0, 4])  # below the deepest measurement: no extrapolation
+    assert np.isnan(out[1, 0])
+    assert np.allclose(out[1, 1:4], np.interp(levels[1:4], [10, 60, 160], [1, 2, 3]))
+    assert np.isnan(out[1, 4])
+
+
+def test_grid_windows_are_level_slices():
+    rows = pd.DataFrame({"float_id": [1, 1, 2, 2], "cycle": [1, 1, 1, 1],
+                         "pressure": [0.0, 2000.0, 0.0, 2000.0], "temperature": [20.0, 2.0, 22.0, 4.0]})
+    grid = profile_grid.build(rows, ["temperature"], truncated=True)
+    assert len(grid) == 2 and grid.truncated
+    means = grid.mean_profiles(["temperature"], depth=(0, 1000))
+    assert means.index.tolist() == list(range(0, 1001, 50))
+    assert means["temperature"].iloc[0] == pytest.approx(21.0)
+    assert means["temperature"].iloc[-1] == pytest.approx(12.0)
@@ -0,0 +1,56 @@
+import pytest
+
+pytest.importorskip("plotly")
+pytest.importorskip("pyarrow")
+pytest.importorskip("duckdb")
+
+import pandas as pd
+
+from query_planner import parse
+
+
+def test_preset_chlorophyll_and_oxygen_vs_depth():
+    plan = parse("Show both chlorophyll and oxygen levels vs depth.")
+    assert plan.kind == "profile"
+    assert plan.params == ["Oxygen", "Chl-a"]
+    assert plan.filters == {}
+
+
+def test_preset_temperature_around_70e():
+    plan = parse("Plot temperature vs depth for floats around 70°E longitude.")
+    assert plan.kind == "profile"
+    assert plan.params == ["Temperature"]
+    assert plan.filters == {"lon_range": (65, 75)}
+
+
+def test_preset_float_metadata():
+    plan = parse("Give me metadata about float 4901234.")
+    assert plan.kind == "metadata"
+    assert plan.filters == {"float_ids": [4901234]}
+
+
+def test_depth_is_not_read_as_a_year():
+    plan = parse("Show temperature in 1000 m depth in the Indian Ocean")
+    assert "date_range" not in plan.filters
+    assert plan.filters["region"] == "Indian Ocean"
+    assert "date_range" not in parse("salinity in 2000 m").filters
+    assert "date_range" not in parse("oxygen in 2000 dbar").filters
+
+
+@pytest.mark.parametrize("question, depth", [
+    ("salinity between 100 and 500 m", (100, 500)),
+    ("temperature 0-200 m", (0, 200)),
+    ("oxygen below 1000 m", (1000, 6000)),
+    ("chlorophyll above 200 dbar", (0, 200)),
+])
+def test_depth_phrasings(question, depth):
+    assert parse(question).filters["depth"] == depth
+
+
+def test_date_phrasings():
+    assert parse("salinity in 2023").filters["date_range"] == [pd.Timestamp(2023, 1, 1), pd.Timestamp(2023, 12, 31)]
+    assert parse("salinity near the equator in march 2023").filters["date_range"] == [
+        pd.Timestamp(2023, 3, 1), pd.Timestamp(2023, 3, 31)]
+    start, end = parse("oxygen trend over the last 6 months").filters["date_range"]
+    assert end == pd.Timestamp.today().normalize()
+    assert start == end - pd.DateOffset(months=6)
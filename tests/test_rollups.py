@@ -0,0 +1,49 @@
+import pytest
+
+pytest.importorskip("pyarrow")
+
+import pandas as pd
+
+import rollups
+
+
+def _chunk():
+    rows = []
+    for float_id, cycle, day, lat, lon, pressures in [(4901234, 1, "2023-03-01", -5.2, 70.5, (5.0, 50.0)),
+                                                       (4901234, 2, "2023-03-11", -4.8, 71.5, (5.0, 1200.0)),
+                                                       (4901235, 1, "2023-04-02", 10.5, 179.5, (600.0, 1200.0))]:
+        for pressure in pressures:
+            rows.append({"float_id": float_id, "cycle": cycle, "time": pd.Timestamp(day), "latitude": lat,
+                         "longitude": lon, "region": "Indian Ocean", "pressure": pressure,
+                         "temperature": 20.0, "salinity": 35.0})
+    return pd.DataFrame(rows)
+
+
+@pytest.fixture
+def root(tmp_path):
+    root = str(tmp_path / "rollups")
+    rollups.update([rollups.rollup_chunk(_chunk())], root)
+    return root
+
+
+@pytest.mark.parametrize("filters, expected", [
+    ({}, 3),
+    ({"region": "Pacific Ocean"}, 0),
+    ({"date_range": ["2023-04-01", "2023-04-30"]}, 1),
+    ({"date_range": ["2023-04-01"]}, 1),
+    ({"depth": (0, 100)}, 2),
+    ({"depth": (1000, 2000)}, 2),
+    ({"depth": (200, 400)}, 1),  # cycle 2 spans 0-1200 m without a level there
+    ({"lat_range": (-5, 0)}, 1),
+    ({"lat_range": (-6, 0), "lon_range": (71, 72)}, 1),
+    ({"lon_range": (179, -179)}, 1),
+    ({"lon_range": (-179, 179)}, 3),
+])
+def test_total_profiles_applies_every_filter(root, filters, expected):
+    assert rollups.total_profiles(root=root, **filters) == expected
+
+
+def test_removed_partials_are_subtracted(root):
+    rollups.update([], root, removed=[rollups.rollup_chunk(_chunk()[lambda c: c["float_id"] == 4901235])])
+    assert rollups.total_profiles(root=root) == 2
+    assert rollups.total_profiles(root=root, lon_range=(179, -179)) == 0
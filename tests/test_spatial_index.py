@@ -0,0 +1,35 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from spatial_index import GridIndex, haversine_km
+
+
+def _brute_bbox(lat, lon, lat_range, lon_range):
+    inside = (lat >= lat_range[0]) & (lat <= lat_range[1])
+    lo, hi = lon_range
+    inside &= ((lon >= lo) & (lon <= hi)) if lo <= hi else ((lon >= lo) | (lon <= hi))
+    return np.flatnonzero(inside)
+
+
+def test_bbox_matches_brute_force_including_wrapped_boxes():
+    rng = np.random.default_rng(0)
+    lat, lon = rng.uniform(-90, 90, 5000), rng.uniform(-180, 180, 5000)
+    index = GridIndex(lat, lon)
+    boxes = [((-20, 20), (60, 100)), ((-10, 10), (170, -170)), ((-30, 30), (10.7, 10.2)),
+             ((-45, 45), (0.9, 0.1))]
+    for _ in range(200):
+        lat_lo = rng.uniform(-90, 80)
+        boxes.append(((lat_lo, lat_lo + rng.uniform(0, 40)), tuple(rng.uniform(-180, 180, 2))))
+    for lat_range, lon_range in boxes:
+        assert index.bbox(lat_range, lon_range).tolist() == _brute_bbox(lat, lon, lat_range, lon_range).tolist()
+
+
+def test_nearest_matches_brute_force():
+    rng = np.random.default_rng(1)
+    lat, lon = rng.uniform(-80, 80, 2000), rng.uniform(-180, 180, 2000)
+    index = GridIndex(lat, lon)
+    for q_lat, q_lon in [(0, 0), (10, 179.5), (-60, -120)]:
+        ids, km = index.nearest(q_lat, q_lon, k=5)
+        expected = np.argsort(haversine_km(q_lat, q_lon, lat, lon), kind="stable")[:5]
+        assert ids.tolist() == expected.tolist()
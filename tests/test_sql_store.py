@@ -0,0 +1,69 @@
+import pytest
+
+pytest.importorskip("duckdb")
+pytest.importorskip("pyarrow")
+
+import pandas as pd
+
+import profile_store
+import sql_store
+
+
+def _measurements():
+    rows = []
+    for float_id, cycle, day, lat, lon in [(4901234, 1, "2023-03-01", -5.0, 70.0),
+                                            (4901234, 2, "2023-03-11", -4.0, 71.0),
+                                            (4901235, 1, "2023-04-02", 10.0, 80.0)]:
+        for pressure in (5.0, 50.0, 500.0):
+            rows.append({"float_id": float_id, "cycle": cycle, "time": pd.Timestamp(day),
+                         "latitude": lat, "longitude": lon, "pressure": pressure,
+                         "temperature": 28 - pressure / 50, "salinity": 35 + pressure / 1000})
+    frame = pd.DataFrame(rows)
+    frame["region"] = profile_store.region_of(frame["latitude"], frame["longitude"])
+    return frame
+
+
+@pytest.fixture
+def db(tmp_path):
+    root = str(tmp_path / "profiles")
+    profile_store.write_profiles(_measurements(), root)
+    path = str(tmp_path / "argo.duckdb")
+    sql_store.rebuild(root, path)
+    return path
+
+
+def test_rebuild_creates_all_tables(db):
+    meta = sql_store.float_metadata([4901234, 4901235], db_path=db)
+    assert meta["float_id"].tolist() == [4901234, 4901235]
+    assert meta["cycles"].tolist() == [2, 1]
+    assert meta["last_lat"].tolist() == [-4.0, 10.0]
+
+
+def test_read_and_count_apply_filters(db):
+    rows = sql_store.read_measurements(["float_id", "pressure"], db_path=db, depth=(0, 100))
+    assert len(rows) == 6
+    assert rows["pressure"].max() == 50.0
+
+    assert sql_store.count_profiles(db_path=db) == 3
+    assert sql_store.count_profiles(db_path=db, date_range=["2023-03-01", "2023-03-31"]) == 2
+    assert sql_store.count_profiles(db_path=db, lat_range=(0, 20), lon_range=(75, 85)) == 1
+    assert sql_store.count_profiles(db_path=db, float_ids=[4901235]) == 1
+
+
+def test_read_measurements_rejects_unknown_columns(db):
+    with pytest.raises(ValueError):
+        sql_store.read_measurements(["float_id; DROP TABLE floats"], db_path=db)
+
+
+def test_read_falls_back_to_parquet_until_rebuilt(tmp_path, db):
+    root = str(tmp_path / "profiles")
+    assert sql_store.fresh(root, db)
+    assert len(sql_store.read(["float_id"], root=root, db_path=db)) == 9
+
+    profile_store.write_profiles(_measurements().assign(float_id=lambda m: m["float_id"] + 100), root)
+    assert not sql_store.fresh(root, db)
+    assert len(sql_store.read(["float_id"], root=root, db_path=db)) == 18
+
+    sql_store.rebuild(root, db)
+    assert sql_store.fresh(root, db)
+    assert sql_store.count_profiles(db_path=db) == 6
@@ -0,0 +1,47 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from vector_index import EmbeddingIndex, IVFIndex, assign_lists, make_index, normalize_rows, train_centroids
+
+
+def _blocks(seed=0, n=3000, dim=16):
+    rng = np.random.default_rng(seed)
+    data = normalize_rows(rng.standard_normal((n, dim)))
+    return [data[:1000], data[1000:]], rng
+
+
+def test_full_probe_matches_exact_search_through_positions():
+    blocks, rng = _blocks()
+    positions = rng.permutation(3000)[:2500]
+    exact = EmbeddingIndex(blocks, normalized=True, positions=positions)
+    ivf = IVFIndex.train(exact, n_lists=16)
+    for q in rng.standard_normal((5, 16)):
+        rows, scores = ivf.search(q, 10, nprobe=16)
+        expected_rows, expected_scores = exact.search(q, 10)
+        assert rows.tolist() == expected_rows.tolist()
+        assert np.allclose(scores, expected_scores)
+
+
+def test_ivf_searches_the_exact_blocks_without_copying():
+    blocks, _ = _blocks()
+    index = make_index(blocks, normalized=True, backend="ivf", n_lists=8)
+    assert all(np.shares_memory(a, b) for a, b in zip(index.exact.blocks, blocks))
+
+
+def test_persisted_lists_are_used_as_given():
+    blocks, rng = _blocks()
+    centroids = train_centroids(blocks, 8)
+    lists = assign_lists(blocks, centroids)
+    assert np.array_equal(np.concatenate([lists[:1500], assign_lists(blocks, centroids, start=1500)]), lists)
+
+    calls = []
+
+    def ivf_lists(**options):
+        calls.append(options)
+        return centroids, lists
+
+    index = make_index(blocks, normalized=True, backend="ivf", ivf_lists=ivf_lists, nprobe=8)
+    assert calls == [{}]
+    rows, _ = index.search(rng.standard_normal(16), 5)
+    assert len(rows) == 5
@@ -0,0 +1,286 @@
+import os
+import time
+
+import numpy as np
+
+# "exact", "ivf", or "auto" (exact below ANN_MIN_ROWS rows, ivf above)
+SEARCH_BACKEND = os.environ.get("SEARCH_BACKEND", "auto")
+ANN_MIN_ROWS = 50_000
+
+
+def normalize_rows(x):
+    """
+    Returns `x` as a contiguous float32 matrix with every row scaled to unit length,
+    so cosine similarity becomes a plain dot product. All-zero rows are left as zeros.
+    """
+    x = np.ascontiguousarray(np.atleast_2d(x), dtype=np.float32)
+    norms = np.linalg.norm(x, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return x / norms
+
+
+def top_k(scores, k: int):
+    """
+    Positions of the `k` largest scores, best first.
+    Uses argpartition so only the k winners get sorted, not the whole array.
+    """
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.empty(0, dtype=np.intp)
+    if k < len(scores):
+        idx = np.argpartition(-scores, k - 1)[:k]
+    else:
+        idx = np.arange(len(scores))
+    return idx[np.argsort(-scores[idx], kind="stable")]
+
+
+class EmbeddingIndex:
+    """
+    Exact cosine search over pre-normalized float32 embeddings.
+    A query is one matrix-vector product per block followed by top_k.
+
+    embeddings: a matrix, or a list of matrices (e.g. memory-mapped store segments)
+                that are searched as if concatenated.
+    normalized: rows are already unit length; the blocks are then used as is, not copied.
+    positions:  optional row (in the concatenated blocks) for each catalog row, so the
+                store's layout doesn't have to match the catalog's order.
+    """
+
+    def __init__(self, embeddings, normalized: bool = False, positions=None):
+        blocks = embeddings if isinstance(embeddings, (list, tuple)) else [embeddings]
+        if normalized:
+            self.blocks = [np.asarray(b, dtype=np.float32) for b in blocks]
+        else:
+            self.blocks = [normalize_rows(b) for b in blocks]
+        # never written after build, so sessions can search them concurrently
+        for b in self.blocks:
+            b.setflags(write=False)
+        self.positions = None if positions is None else np.asarray(positions, dtype=np.intp)
+        # first global row of each block, for scoring arbitrary subsets
+        self.offsets = np.cumsum([0] + [b.shape[0] for b in self.blocks])
+
+    def __len__(self):
+        if self.positions is not None:
+            return len(self.positions)
+        return sum(b.shape[0] for b in self.blocks)
+
+    def scores(self, query_emb):
+        """Cosine score of every catalog row against query_emb."""
+        q = normalize_rows(query_emb)[0]
+        if not self.blocks:
+            return np.empty(0, dtype=np.float32)
+        scores = np.concatenate([b @ q for b in self.blocks]) if len(self.blocks) > 1 else self.blocks[0] @ q
+        return scores if self.positions is None else scores[self.positions]
+
+    def subset_scores(self, query_emb, rows):
+        """Cosine scores of just the catalog `rows`; only those vectors are read."""
+        q = normalize_rows(query_emb)[0]
+        store_rows = rows if self.positions is None else self.positions[rows]
+        block_of = np.searchsorted(self.offsets, store_rows, side="right") - 1
+        scores = np.empty(len(rows), dtype=np.float32)
+        for b in np.unique(block_of):
+            mask = block_of == b
+            scores[mask] = self.blocks[b][store_rows[mask] - self.offsets[b]] @ q
+        return scores
+
+    def search(self, query_emb, n_results: int = 5, candidates=None):
+        """
+        Returns (row positions, cosine scores) of the n_results closest rows.
+        candidates: optional row positions to restrict the search to (e.g. from MetadataIndex).
+        """
+        if candidates is None:
+            scores = self.scores(query_emb)
+            rows = top_k(scores, n_results)
+            return rows, scores[rows]
+        candidates = np.asarray(candidates, dtype=np.intp)
+        scores = self.subset_scores(query_emb, candidates)
+        best = top_k(scores, n_results)
+        return candidates[best], scores[best]
+
+
+def default_n_lists(n: int) -> int:
+    """IVF list count for n vectors (~4*sqrt(n))."""
+    return max(1, int(4 * np.sqrt(n)))
+
+
+def _gather(blocks, rows):
+    # rows of the concatenated blocks, reading only those rows from each block
+    offsets = np.cumsum([0] + [b.shape[0] for b in blocks])
+    block_of = np.searchsorted(offsets, rows, side="right") - 1
+    return np.concatenate([blocks[b][rows[block_of == b] - offsets[b]] for b in np.unique(block_of)])
+
+
+def train_centroids(blocks, n_lists: int = None, train_size: int = 100_000, n_iter: int = 10, seed: int = 0):
+    """
+    Spherical k-means centroids for IVF search over the rows of `blocks` (a list of
+    unit-length matrices, e.g. memory-mapped store segments). Only a sample of up to
+    train_size rows is read.
+    """
+    rng = np.random.default_rng(seed)
+    n = sum(b.shape[0] for b in blocks)
+    sample = normalize_rows(_gather(blocks, np.sort(rng.choice(n, size=min(train_size, n), replace=False))))
+    n_lists = max(1, min(n_lists or default_n_lists(n), len(sample)))
+    centroids = sample[rng.choice(len(sample), size=n_lists, replace=False)].copy()
+    for _ in range(n_iter):
+        labels = np.argmax(sample @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, labels, sample)
+        empty = ~np.any(sums, axis=1)
+        # re-seed empty clusters with random points
+        sums[empty] = sample[rng.choice(len(sample), size=int(empty.sum()))]
+        centroids = normalize_rows(sums)
+    return centroids
+
+
+def assign_lists(blocks, centroids, start: int = 0, chunk: int = 65_536):
+    """
+    IVF list (closest centroid) of every row of the concatenated blocks from row
+    `start` on, as int32. Blocks are streamed in chunks, never copied whole.
+    """
+    out, offset = [], 0
+    for b in blocks:
+        for i in range(max(start - offset, 0), b.shape[0], chunk):
+            out.append(np.argmax(np.asarray(b[i:i + chunk]) @ centroids.T, axis=1).astype(np.int32))
+        offset += b.shape[0]
+    return np.concatenate(out) if out else np.empty(0, dtype=np.int32)
+
+
+class IVFIndex:
+    """
+    Approximate cosine search with an inverted file: vectors are clustered with
+    spherical k-means and a query only scans the `nprobe` clusters whose centroids
+    are closest to it. Same search() as EmbeddingIndex, so either can back pandas_query.
+
+    The vectors stay where the EmbeddingIndex has them (e.g. memory-mapped store
+    segments); the IVF index only holds the centroids and, per list, its catalog rows,
+    and scores a probe's rows through EmbeddingIndex.subset_scores.
+
+    exact:     the EmbeddingIndex to search
+    centroids: (n_lists, dim) unit-length centroids (train_centroids)
+    lists:     list of every row of exact's blocks (assign_lists), e.g. persisted by
+               EmbeddingStore.ivf_lists() so restarts don't retrain
+    nprobe:    clusters scanned per query; the recall/latency knob. nprobe == n_lists is exact.
+    """
+
+    def __init__(self, exact: EmbeddingIndex, centroids, lists, nprobe: int = 8):
+        self.exact = exact
+        self.centroids = np.asarray(centroids, dtype=np.float32)
+        self.n_lists = self.centroids.shape[0]
+        self.nprobe = nprobe
+        lists = np.asarray(lists)
+        catalog_lists = lists if exact.positions is None else lists[exact.positions]
+        # catalog rows of the same list are kept together, so a probe is a slice of ids
+        self.ids = np.argsort(catalog_lists, kind="stable").astype(np.intp)
+        self.offsets = np.searchsorted(catalog_lists[self.ids], np.arange(self.n_lists + 1))
+        for a in (self.centroids, self.ids, self.offsets):
+            a.setflags(write=False)
+
+    @classmethod
+    def train(cls, exact: EmbeddingIndex, n_lists: int = None, nprobe: int = 8, train_size: int = 100_000,
+              n_iter: int = 10, seed: int = 0):
+        """Trains centroids on a sample of exact's rows and assigns every row to a list."""
+        centroids = train_centroids(exact.blocks, n_lists, train_size, n_iter, seed)
+        return cls(exact, centroids, assign_lists(exact.blocks, centroids), nprobe=nprobe)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def search(self, query_emb, n_results: int = 5, candidates=None, nprobe: int = None):
+        """
+        Returns (row positions, cosine scores) of the approximately closest rows.
+        With `candidates` (a pre-filtered set of rows) those rows are scored exactly instead.
+        """
+        if candidates is not None:
+            return self.exact.search(query_emb, n_results, candidates=candidates)
+        q = normalize_rows(query_emb)[0]
+        probes = top_k(self.centroids @ q, nprobe or self.nprobe)
+        spans = [self.ids[self.offsets[p]:self.offsets[p + 1]] for p in probes]
+        rows = np.concatenate(spans) if spans else np.empty(0, dtype=np.intp)
+        scores = self.exact.subset_scores(q, rows)
+        best = top_k(scores, n_results)
+        return rows[best], scores[best]
+
+
+def make_index(embeddings, normalized: bool = False, positions=None, backend: str = SEARCH_BACKEND,
+               ivf_lists=None, **ann_options):
+    """
+    Builds the search backend for pandas_query: EmbeddingIndex, or IVFIndex for large catalogs.
+    ivf_lists: optional callable returning persisted (centroids, lists) for the embeddings'
+               rows (e.g. EmbeddingStore.ivf_lists); without it the IVF index is trained here.
+    """
+    exact = EmbeddingIndex(embeddings, normalized=normalized, positions=positions)
+    if backend == "exact" or (backend == "auto" and len(exact) < ANN_MIN_ROWS):
+        return exact
+    if backend in ("ivf", "auto"):
+        if ivf_lists is not None:
+            nprobe = ann_options.pop("nprobe", 8)
+            return IVFIndex(exact, *ivf_lists(**ann_options), nprobe=nprobe)
+        return IVFIndex.train(exact, **ann_options)
+    raise ValueError(f"unknown search backend: {backend}")
+
+
+def benchmark(n: int = 200_000, dim: int = 384, n_queries: int = 200, k: int = 10,
+              nprobes=(1, 4, 8, 16, 32, 64), seed: int = 0):
+    """
+    Recall@k and latency of IVFIndex against the exact EmbeddingIndex on clustered
+    synthetic embeddings. Returns one dict per nprobe setting.
+    """
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((256, dim)).astype(np.float32)
+    data = centers[rng.integers(0, len(centers), n)] + 0.5 * rng.standard_normal((n, dim)).astype(np.float32)
+    queries = data[rng.choice(n, n_queries, replace=False)] + 0.1 * rng.standard_normal((n_queries, dim)).astype(np.float32)
+
+    exact = EmbeddingIndex(data)
+    start = time.perf_counter()
+    truth = [set(exact.search(q, k)[0].tolist()) for q in queries]
+    exact_ms = (time.perf_counter() - start) * 1000 / n_queries
+
+    start = time.perf_counter()
+    ivf = IVFIndex.train(exact)
+    build_s = time.perf_counter() - start
+
+    results = []
+    for nprobe in nprobes:
+        start = time.perf_counter()
+        found = [ivf.search(q, k, nprobe=nprobe)[0] for q in queries]
+        ms = (time.perf_counter() - start) * 1000 / n_queries
+        recall = np.mean([len(truth[i].intersection(f.tolist())) / k for i, f in enumerate(found)])
+        results.append({"nprobe": nprobe, "recall": float(recall), "ms_per_query": ms,
+                        "exact_ms_per_query": exact_ms, "build_s": build_s, "n_lists": ivf.n_lists})
+    return results
+
+
+class SearchResult:
+    """
+    Lightweight answer to a query: row positions and scores into a read-only frame.
+    Nothing is copied out of the frame until to_frame() asks for specific rows/columns,
+    and the frame itself is never written to, so concurrent sessions don't interfere.
+    """
+
+    __slots__ = ("frame", "rows", "scores")
+
+    def __init__(self, frame, rows, scores):
+        self.frame = frame
+        self.rows = rows
+        self.scores = scores
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __iter__(self):
+        return iter(zip(self.rows.tolist(), self.scores.tolist()))
+
+    def to_frame(self, columns=None):
+        """Matched rows (optionally only `columns`), best first, with a `similarity` column."""
+        if columns is None:
+            out = self.frame.iloc[self.rows]
+        else:
+            out = self.frame.iloc[self.rows, self.frame.columns.get_indexer(list(columns))]
+        return out.assign(similarity=self.scores)
+
+
+if __name__ == "__main__":
+    # python vector_index.py  ->  recall vs. exact for each nprobe
+    for r in benchmark():
+        print(f"nprobe={r['nprobe']:>3}/{r['n_lists']}  recall@10={r['recall']:.3f}  "
+              f"{r['ms_per_query']:.2f} ms/query  (exact {r['exact_ms_per_query']:.2f} ms, build {r['build_s']:.1f}s)")